@@ -10,13 +10,13 @@ import maze, component
 def create(world, **kwargs):
     '''
     A function to create an entity, designed to make game.py smaller and easier to read.
-    Accepted kwargs are: position, sprite, layer, script, attachClass, classArgs, dimension
+    Accepted kwargs are: position, sprite, layer, script, attachClass, classArgs, dimension, static
     '''
     entity = world.createEntity()
     if 'position' in kwargs:
-        entity.addComponent(component.Position(kwargs['position']))
+        entity.addComponent(world.createComponent(component.Position, kwargs['position']))
     if 'lastPosition' in kwargs:
-        entity.addComponent(component.LastPosition(kwargs['lastPosition']))
+        entity.addComponent(world.createComponent(component.LastPosition, kwargs['lastPosition']))
 
     if 'sprite' in kwargs:
         if 'layer' not in kwargs:
@@ -24,18 +24,21 @@ def create(world, **kwargs):
         if 'offset' not in kwargs:
             kwargs['offset'] = (0, 0)
         kwargs['sprite'] = Asset.Manager.getInstance().getSprite(kwargs['sprite'])
-        entity.addComponent(component.Drawable(kwargs['sprite'], kwargs['layer'], kwargs['offset']))
+        entity.addComponent(world.createComponent(component.Drawable, kwargs['sprite'], kwargs['layer'], kwargs['offset']))
 
     if 'attachClass' in kwargs:
         if 'classArgs' not in kwargs:
             kwargs['classargs'] = ''
         entity.addComponent(kwargs['attachClass'](item for item in kwargs['classArgs']))
     if 'script' in kwargs:
-        entity.addComponent(component.Script())
+        entity.addComponent(world.createComponent(component.Script))
         entity.getComponent("Script").attach(kwargs['script'])
 
     if 'dimension' in kwargs:
-        entity.addComponent(component.Dimension(kwargs['dimension']))
+        entity.addComponent(world.createComponent(component.Dimension, kwargs['dimension']))
+
+    if kwargs.get('static', False):
+        entity.addComponent(world.createComponent(component.Static))
 
     return entity
 
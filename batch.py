@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Runs many headless simulations in parallel on a pool of worker processes,
+e.g. to fuzz player input against guard patrols or to check that every level
+can be completed, and aggregates their outcomes.
+
+Workers are reused between runs, so pygame start-up and level loading are paid
+once per worker rather than once per run.
+
+Usage (from the repository root):
+    python batch.py --runs 200 --ticks 3600 level01 level02 level03
+'''
+import os, time, random, argparse
+import multiprocessing
+from collections import namedtuple
+
+import headless
+
+# A run of one level. presses is a list of (tick, keyName, duration) tuples,
+# kept as plain data so jobs can be pickled to the workers.
+Job = namedtuple('Job', ['level', 'presses', 'ticks', 'seed'])
+
+KEY_NAMES = ('Left', 'Right', 'Up', 'Down', 'Interact')
+
+def initWorker(directory):
+    os.chdir(directory)
+    headless.setup()
+
+def runJob(job):
+    script = []
+    for tick, keyName, duration in job.presses:
+        script += headless.press(tick, keyName, duration)
+    return job, headless.simulate(job.level, script, job.ticks)
+
+def randomPresses(rng, ticks, averageGap=30):
+    # Random key presses of random lengths, roughly averageGap ticks apart
+    presses = []
+    tick = rng.randint(0, averageGap)
+    while tick < ticks:
+        duration = rng.randint(1, averageGap * 4)
+        presses.append((tick, rng.choice(KEY_NAMES), duration))
+        tick += duration + rng.randint(0, averageGap)
+    return presses
+
+def fuzzJobs(levels, runs, ticks, seed=0):
+    jobs = []
+    for level in levels:
+        for run in range(runs):
+            runSeed = hash((seed, level, run))
+            jobs.append(Job(level, randomPresses(random.Random(runSeed), ticks), ticks, runSeed))
+    return jobs
+
+def runBatch(jobs, processes=None):
+    directory = os.path.dirname(os.path.abspath(__file__))
+    processes = processes or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes, initWorker, (directory,))
+    try:
+        return pool.map(runJob, jobs, chunksize=max(1, len(jobs) / (processes * 4)))
+    finally:
+        pool.close()
+        pool.join()
+
+def summarise(runs):
+    # Per level: run count, outcome counts, mean ticks and simulation throughput
+    summary = {}
+    for job, result in runs:
+        level = summary.setdefault(result.level, {
+            'runs': 0, 'GAMEOVER': 0, 'LEVELCOMPLETE': 0, 'none': 0,
+            'ticks': 0, 'elapsed': 0.0, 'completedBy': None
+        })
+        level['runs'] += 1
+        level[result.outcome or 'none'] += 1
+        level['ticks'] += result.ticks
+        level['elapsed'] += result.elapsed
+        if result.outcome == 'LEVELCOMPLETE' and level['completedBy'] is None:
+            level['completedBy'] = job
+    return summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Fuzz levels with random input across worker processes.')
+    parser.add_argument('levels', nargs='*', default=['setupWorld', 'level01', 'level02', 'level03', 'level04', 'level05'])
+    parser.add_argument('--runs', type=int, default=50, help='runs per level')
+    parser.add_argument('--ticks', type=int, default=3600)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    jobs = fuzzJobs(args.levels, args.runs, args.ticks, args.seed)
+    start = time.time()
+    runs = runBatch(jobs, args.processes)
+    wallTime = time.time() - start
+
+    summary = summarise(runs)
+    totalTicks = 0
+    print '%-12s %6s %9s %9s %6s %10s %10s' % ('level', 'runs', 'gameover', 'complete', 'none', 'mean ticks', 'ticks/s')
+    for level in args.levels:
+        stats = summary[level]
+        totalTicks += stats['ticks']
+        print '%-12s %6d %9d %9d %6d %10.0f %10.0f' % (level, stats['runs'], stats['GAMEOVER'],
+            stats['LEVELCOMPLETE'], stats['none'], float(stats['ticks']) / stats['runs'],
+            stats['ticks'] / stats['elapsed'] if stats['elapsed'] > 0 else 0)
+    print '%d runs, %d ticks in %.2fs wall time (%.0f ticks/s overall)' % \
+        (len(runs), totalTicks, wallTime, totalTicks / wallTime)
+
+    uncompleted = [level for level in args.levels if summary[level]['completedBy'] is None]
+    if len(uncompleted) > 0:
+        print 'No run completed: %s' % ', '.join(uncompleted)
+
+if __name__ == '__main__': main()
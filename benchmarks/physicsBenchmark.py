@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Compares PhysicsSystem throughput with and without a VectorStore.
+
+Usage (from the repository root):
+    python benchmarks/physicsBenchmark.py [ticks]
+'''
+import os, sys, time
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import component
+from ecs import World
+from systems import PhysicsSystem
+from util import VectorStore
+
+def createBodies(world, count):
+    for i in xrange(count):
+        entity = world.createEntity()
+        entity.addComponent(component.Position((i % 64, i / 64)))
+        entity.addComponent(component.Velocity((0.5, 0.25)))
+        entity.addComponent(component.Acceleration((0.1, -0.1)))
+        world.addEntity(entity)
+
+def run(count, ticks, useStore):
+    world = World()
+    if useStore:
+        world.addManager('Vector', VectorStore(world, ('Position', 'Velocity', 'Acceleration')))
+    world.addSystem(PhysicsSystem())
+    createBodies(world, count)
+
+    dt = 1.0 / 60.0
+    start = time.time()
+    for tick in xrange(ticks):
+        world.update(dt)
+    return (time.time() - start) / ticks
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    print '%8s %14s %14s' % ('bodies', 'objects (ms)', 'store (ms)')
+    for count in (10, 100, 1000, 5000, 20000):
+        objects = run(count, ticks, False) * 1000
+        store = run(count, ticks, True) * 1000 if VectorStore.isAvailable() else float('nan')
+        print '%8d %14.3f %14.3f' % (count, objects, store)
+
+if __name__ == '__main__': main()
@@ -3,10 +3,15 @@ from newvector import Vector2
 from ecs import Component
 from util import enums
 from util import Asset
+from util import StoredVector
 
 class Visible(Component):
     pass
 
+class Static(Component):
+    # Marks a drawable whose position and image never change, so it can be baked
+    pass
+
 class Concealable(Component):
     def __init__(self):
         super(Concealable, self).__init__()
@@ -26,7 +31,16 @@ class Facing(Component):
     LEFT, RIGHT = 'left', 'right'
     def __init__(self, direction=None):
         super(Facing, self).__init__()
-        self.direction = direction if direction is not None else Facing.RIGHT
+        self._direction = direction if direction is not None else Facing.RIGHT
+
+    def getDirection(self):
+        return self._direction
+
+    def setDirection(self, direction):
+        if direction != self._direction:
+            self._direction = direction
+            self.markChanged()
+    direction = property(getDirection, setDirection)
 
 class Camera(Component):
     def __init__(self, viewportSize, viewportPosition=(0, 0), layer=0):
@@ -41,6 +55,8 @@ class Camera(Component):
 
     def setViewport(self, viewportSize):
         self.viewport = pygame.Surface(viewportSize, pygame.locals.SRCALPHA)
+        self.viewportSize = Vector2(self.viewport.get_size())
+        self.markChanged()
 
 class Constant(Component):
     def __init__(self, value=0):
@@ -55,13 +71,39 @@ class AccelerationConstant(Constant):
 class Vector(Component):
     def __init__(self, vector=Vector2()):
         super(Vector, self).__init__()
-        self.value = Vector2(vector)
+        self._value = Vector2(vector)
+
+    def getValue(self):
+        return self._value
+
+    def setValue(self, value):
+        # Values held in a VectorStore are written through to their row
+        if isinstance(self._value, StoredVector):
+            self._value.set(value)
+        else:
+            self._value = value
+        self.markChanged()
+    value = property(getValue, setValue)
+
+    def getChanged(self):
+        # Rows of a VectorStore are also stamped in bulk, see VectorStore.markChanged
+        value = self._value
+        if value.__class__ is StoredVector:
+            return max(self._changed, value.getVersion())
+        return self._changed
+
+    def setChanged(self, version):
+        self._changed = version
+    changed = property(getChanged, setChanged)
 
 class Acceleration(Vector):
     pass
 
 class Position(Vector):
-    pass
+    def __init__(self, vector=Vector2()):
+        super(Position, self).__init__(vector)
+        # The value at the start of the last simulation step, if it's known
+        self.previous = None
 
 class LastPosition(Vector):
     pass
@@ -85,12 +127,24 @@ class Drawable(Component):
     def set(self, sprite, layer=None, offset=None):
         self.sprite = sprite
         self.image = sprite.current()
+        self.markChanged()
 
         if layer is not None:
             self.layer = layer
         if offset is not None:
             self.offset = Vector2(offset)
 
+    def getLayer(self):
+        return self._layer
+
+    def setLayer(self, layer):
+        if layer != getattr(self, '_layer', None):
+            self._layer = layer
+            # Let the world's managers re-sort the entity into its new layer
+            if self.entity is not None:
+                self.entity._world.onEntityChanged(self.entity)
+    layer = property(getLayer, setLayer)
+
     def flip(self, flip=None):
         if flip is None:
             self.flipped = not self.flipped
@@ -111,17 +165,34 @@ class EventHandler(Component):
         super(EventHandler, self).__init__()
         self.handlers = {}
 
-    def attach(self, eventName, handler):
-        if not eventName in self.handlers:
-            self.handlers[eventName] = []
-        self.handlers[eventName].append(handler)
+    def attach(self, eventName, handler, action=None):
+        # With an action (a name from util.enums.keys) the handler only
+        # receives events for keys bound to that action.
+        key = eventName if action is None else (eventName, action)
+        if not key in self.handlers:
+            self.handlers[key] = []
+        self.handlers[key].append(handler)
+        # So the InputSystem knows to re-index this entity's subscriptions
+        self.markChanged()
+
+    def getSubscriptions(self):
+        return [key for key, handlers in self.handlers.iteritems() if len(handlers) > 0]
 
     def handle(self, event):
-        eventName = event.type
-        if eventName in self.handlers and len(self.handlers[eventName]) > 0:
-            for handler in self.handlers[eventName]:
+        self.dispatch(event.type, event)
+        action = getAction(event)
+        if action is not None:
+            self.dispatch((event.type, action), event)
+
+    def dispatch(self, key, event):
+        if key in self.handlers:
+            for handler in self.handlers[key]:
                 handler(self.entity, event)
 
+def getAction(event):
+    key = getattr(event, 'key', None)
+    return enums.keys.get(key) if key is not None else None
+
 
 class Interactable(EventHandler):
     def __init__(self, handler=None):
@@ -148,9 +219,18 @@ class State(Component):
 class SpriteState(State):
     def __init__(self, **kwargs):
         super(SpriteState, self).__init__(**kwargs)
-        self.current = None
+        self._current = None
         self.last = None
 
+    def getCurrent(self):
+        return self._current
+
+    def setCurrent(self, current):
+        if current != self._current:
+            self._current = current
+            self.markChanged()
+    current = property(getCurrent, setCurrent)
+
 
 class Collidable(Component):
     def __init__(self):
@@ -0,0 +1,36 @@
+class CommandBuffer(object):
+    '''
+    Records structural changes (adding/removing components and entities) so that
+    systems don't mutate the world while it is being iterated. The world flushes
+    the buffer at its sync points, between systems in World.update.
+    '''
+    def __init__(self, world):
+        self.world = world
+        self.commands = []
+
+    def addEntity(self, entity):
+        self.commands.append((self.world.addEntity, (entity,)))
+
+    def destroyEntity(self, entity):
+        self.commands.append((self.world.destroyEntity, (entity,)))
+
+    def addComponent(self, entity, component):
+        self.commands.append((entity.addComponent, (component,)))
+        return component
+
+    def removeComponent(self, entity, component):
+        self.commands.append((entity.removeComponent, (component,)))
+
+    def releaseComponent(self, entity, componentName):
+        self.commands.append((self.world.releaseComponent, (entity, componentName)))
+
+    def flush(self):
+        # Commands may queue further commands, so apply until we run dry
+        while len(self.commands) > 0:
+            commands = self.commands
+            self.commands = []
+            for command, args in commands:
+                command(*args)
+
+    def __len__(self):
+        return len(self.commands)
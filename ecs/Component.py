@@ -1,5 +1,42 @@
+from threading import Lock
+
+# Maps component names to small integer type ids, so entities can keep
+# their components in a list and describe their makeup as a bitmask.
+typeIds = {}
+
+def getTypeId(componentName):
+    typeId = typeIds.get(componentName)
+    if typeId is None:
+        typeId = typeIds[componentName] = len(typeIds)
+    return typeId
+
+def getMask(componentNames):
+    mask = 0
+    for componentName in componentNames:
+        mask |= 1 << getTypeId(componentName)
+    return mask
+
+# A counter which components and entities are stamped with when they change,
+# so systems can find what changed since they last ran. Systems in the same
+# Scheduler stage stamp from several threads at once, hence the lock.
+changeVersion = 0
+versionLock = Lock()
+
+def nextVersion():
+    global changeVersion
+    with versionLock:
+        changeVersion += 1
+        return changeVersion
+
+def currentVersion():
+    return changeVersion
+
 class Component(object):
     # Represents a component that an entity can have.
     def __init__(self):
         self._name = self.__class__.__name__
         self.entity = None
+        self.changed = nextVersion()
+
+    def markChanged(self):
+        self.changed = nextVersion()
@@ -1,34 +1,87 @@
+from collections import namedtuple
+from .Component import typeIds, getTypeId, nextVersion
+
+# A reference to an entity which can tell when its id has been recycled
+EntityHandle = namedtuple('EntityHandle', ['id', 'generation'])
+
 class Entity:
     # Represents a game entity, which can be given components.
 
-    def __init__(self, id, world):
-        self.id = id
+    def __init__(self, id, world, generation=0):
         self._world = world
-        self.components = {}
+        self.reset(id, generation)
+
+    def reset(self, id, generation=0):
+        self.id = id
+        self.generation = generation
+        # Components are indexed by type id, and the bits of the signature
+        # record which type ids are present.
+        self.components = []
+        self.signature = 0
+        # Bits for the groups the entity belongs to, see GroupManager
+        self.groupBits = 0
+        # Stamped whenever the set of components changes
+        self.changed = nextVersion()
+
+    def getHandle(self):
+        return EntityHandle(self.id, self.generation)
 
     def addComponent(self, component):
         if hasattr(component, '_name'):
-            self.components[component._name] = component
+            typeId = getTypeId(component._name)
+            if typeId >= len(self.components):
+                self.components.extend([None] * (typeId + 1 - len(self.components)))
+            self.components[typeId] = component
+            self.signature |= 1 << typeId
             setattr(component, 'entity', self)
+            self.changed = nextVersion()
         else:
             raise ValueError('Attempted to add an object which isn\'t a component')
+        self._world.onEntityChanged(self)
         return component
 
     def removeComponent(self, component):
         if isinstance(component, basestring):
-            del self.components[component]
+            typeId = getTypeId(component)
         elif hasattr(component, '_name'):
-            del self.components[component._name]
+            typeId = getTypeId(component._name)
         else:
             raise ValueError('Attempted to remove an object which isn\'t a component')
+        if not self.signature & (1 << typeId):
+            raise KeyError(component)
+        self.components[typeId] = None
+        self.signature &= ~(1 << typeId)
+        self.changed = nextVersion()
+        self._world.onEntityChanged(self)
 
     def hasComponent(self, component):
-        if isinstance(component, basestring):
-            return component in self.components
+        # Names are the common case, so they are looked up first
+        try:
+            typeId = typeIds.get(component)
+        except TypeError:
+            typeId = None
+        if typeId is not None:
+            return self.signature & (1 << typeId) != 0
+        elif isinstance(component, basestring):
+            return False
         elif hasattr(component, '_name'):
-            return component._name in self.components
+            return self.signature & (1 << getTypeId(component._name)) != 0
         else:
             raise ValueError('Attempted to lookup an object which isn\'t a component')
 
+    def hasComponents(self, mask):
+        return self.signature & mask == mask
+
     def getComponent(self, componentName):
-        return self.components[componentName]
+        try:
+            component = self.components[typeIds[componentName]]
+        except IndexError:
+            component = None
+        if component is None:
+            raise KeyError(componentName)
+        return component
+
+    def getComponentById(self, typeId):
+        if typeId < len(self.components):
+            return self.components[typeId]
+        return None
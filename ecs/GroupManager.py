@@ -2,33 +2,85 @@ from .Entity import Entity
 
 class GroupManager:
     def __init__(self, world):
+        # Each group has a small integer id, which is the bit it sets in the
+        # groupBits of its members, and a member set shared through a
+        # read-only view.
         self.groups = {}
+        self.groupIds = {}
+        self.views = {}
+        self.groupSets = {}
         self.world = world
 
 
     def add(self, group, entity):
         if group not in self.groups:
-            self.groups[group] = set()
+            self.createGroup(group)
         self.groups[group].add(entity)
+        entity.groupBits |= 1 << self.groupIds[group]
 
-    def getAll(self, groups):
-        if not hasattr(groups, '__iter__'):
-            groups = (groups,)
+    def remove(self, group, entity):
+        if group in self.groups:
+            self.groups[group].discard(entity)
+            entity.groupBits &= ~(1 << self.groupIds[group])
+
+    def onEntityRemoved(self, entity):
+        if entity.groupBits:
+            for group, groupId in self.groupIds.iteritems():
+                if entity.groupBits & (1 << groupId):
+                    self.groups[group].discard(entity)
+            entity.groupBits = 0
+
+    def clear(self):
+        # Empty every group, keeping the views handed out so far valid
+        for members in self.groups.values():
+            for entity in members:
+                entity.groupBits = 0
+            members.clear()
 
-        resultGroups = {}
-        for group in groups:
-            resultGroups[group] = self.get(group)
+    def getAll(self, groups):
+        # The result only holds live views, so it can be cached and shared.
+        # Iterables of groups are keyed by their contents, as a tuple.
+        key = tuple(groups) if hasattr(groups, '__iter__') else groups
+        if key not in self.groupSets:
+            resultGroups = {}
+            for group in key if isinstance(key, tuple) else (key,):
+                resultGroups[group] = self.get(group)
+            self.groupSets[key] = resultGroups
 
-        return resultGroups
+        return self.groupSets[key]
 
     def get(self, group):
-        if group in self.groups:
-            return frozenset(self.groups[group])
-        else:
-            return frozenset()
+        if group not in self.views:
+            # Create the group now, so that the view sees later members
+            self.createGroup(group)
+        return self.views[group]
+
+    def createGroup(self, group):
+        self.groupIds[group] = len(self.groupIds)
+        self.groups[group] = set()
+        self.views[group] = GroupView(self.groups[group])
 
     def check(self, entity, group):
-        if group in self.groups:
-            return entity in self.groups[group]
+        if group in self.groupIds:
+            return bool(entity.groupBits & (1 << self.groupIds[group]))
         else:
             return False
+
+class GroupView(object):
+    # A read-only, live view of the members of a group
+    __slots__ = ['_members']
+
+    def __init__(self, members):
+        self._members = members
+
+    def __iter__(self):
+        return iter(self._members)
+
+    def __len__(self):
+        return len(self._members)
+
+    def __contains__(self, entity):
+        return entity in self._members
+
+    def __repr__(self):
+        return 'GroupView(%r)' % list(self._members)
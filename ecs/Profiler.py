@@ -0,0 +1,80 @@
+import csv, json
+from collections import deque, namedtuple
+from timeit import default_timer
+
+Sample = namedtuple('Sample', ['frame', 'world', 'system', 'time', 'entities', 'events'])
+
+class Profiler(object):
+    '''
+    Records how long each system takes, how many entities it processed and how
+    many queued events it had, into a rolling buffer of the last few frames.
+    Attach it to any world whose systems should be measured.
+    '''
+    def __init__(self, capacity=60 * 14 * 10):
+        self.samples = deque(maxlen=capacity)
+        self.frame = 0
+        self.pending = {}
+
+    def attach(self, world):
+        if self.before not in world.preSystemHooks:
+            world.preSystemHooks.append(self.before)
+            world.postSystemHooks.append(self.after)
+
+    def detach(self, world):
+        if self.before in world.preSystemHooks:
+            world.preSystemHooks.remove(self.before)
+            world.postSystemHooks.remove(self.after)
+
+    def before(self, world, system, entities):
+        self.pending[system] = (default_timer(), len(system.eventQueue))
+
+    def after(self, world, system, entities):
+        start, events = self.pending.pop(system)
+        elapsed = default_timer() - start
+        self.samples.append(Sample(self.frame, id(world), system.__class__.__name__,
+            elapsed, len(entities), events))
+
+    def record(self, world, name, elapsed, entities=0, events=0):
+        # For work done outside a system, such as presenting the frame
+        self.samples.append(Sample(self.frame, id(world) if world is not None else None,
+            name, elapsed, entities, events))
+
+    def endFrame(self):
+        self.frame += 1
+
+    def getSamples(self, systemName=None):
+        if systemName is None:
+            return tuple(self.samples)
+        return tuple(sample for sample in self.samples if sample.system == systemName)
+
+    def summary(self):
+        # Per system: calls, mean and worst time in ms, and mean entity count
+        totals = {}
+        for sample in self.samples:
+            calls, time, worst, entities = totals.get(sample.system, (0, 0, 0, 0))
+            totals[sample.system] = (calls + 1, time + sample.time,
+                max(worst, sample.time), entities + sample.entities)
+
+        result = {}
+        for system, (calls, time, worst, entities) in totals.iteritems():
+            result[system] = {
+                'calls': calls,
+                'meanMs': time * 1000 / calls,
+                'maxMs': worst * 1000,
+                'meanEntities': float(entities) / calls
+            }
+        return result
+
+    def dumpCSV(self, fileName):
+        with open(fileName, 'wb') as f:
+            writer = csv.writer(f)
+            writer.writerow(Sample._fields)
+            for sample in self.samples:
+                writer.writerow(sample)
+
+    def dumpJSON(self, fileName):
+        with open(fileName, 'w') as f:
+            json.dump({
+                'samples': [sample._asdict() for sample in self.samples],
+                'summary': self.summary()
+            }, f, indent=4)
@@ -0,0 +1,73 @@
+from multiprocessing.pool import ThreadPool
+
+class Scheduler(object):
+    '''
+    Runs a world's systems on a thread pool, using the component read/write sets
+    they declare to decide which can run together. Systems are grouped into
+    stages: each system runs in the stage after the last earlier system it
+    conflicts with, so the result matches running them one by one in order.
+    Systems which don't declare their writes conflict with everything.
+    '''
+    pools = {}
+
+    def __init__(self, world, workers=4):
+        self.world = world
+        self.workers = workers
+        self.stages = None
+        self.plannedSystems = None
+
+    @staticmethod
+    def getPool(workers):
+        # Pools are shared between worlds, as they are rebuilt on every restart
+        if workers not in Scheduler.pools:
+            Scheduler.pools[workers] = ThreadPool(workers)
+        return Scheduler.pools[workers]
+
+    def getStages(self):
+        if self.plannedSystems != self.world.systems:
+            self.stages = planStages(self.world.systems)
+            self.plannedSystems = list(self.world.systems)
+        return self.stages
+
+    def run(self, dt):
+        commandBuffer = self.world.getCommandBuffer()
+        for stage in self.getStages():
+            # Systems which aren't due this tick keep accumulating their dt
+            work = [(self.world, system, system.getProcessableEntities(self.world), system.takeElapsed())
+                for system in stage if self.world.isDue(system)]
+            if len(work) == 0:
+                continue
+            if len(work) == 1:
+                runSystem(work[0])
+            else:
+                Scheduler.getPool(self.workers).map(runSystem, work)
+            commandBuffer.flush()
+
+def runSystem(work):
+    world, system, entities, dt = work
+    world.runSystem(system, entities, dt)
+
+def conflicts(first, second):
+    if first.writes is None or second.writes is None:
+        return True
+    firstReads = set(first.reads) | set(first.requirements)
+    secondReads = set(second.reads) | set(second.requirements)
+    firstWrites = set(first.writes)
+    secondWrites = set(second.writes)
+    return len(firstWrites & (secondReads | secondWrites)) > 0 or \
+        len(secondWrites & firstReads) > 0
+
+def planStages(systems):
+    # Place each system one stage after the latest system it depends on
+    levels = []
+    for index, system in enumerate(systems):
+        level = 0
+        for earlier in range(index):
+            if conflicts(systems[earlier], system):
+                level = max(level, levels[earlier] + 1)
+        levels.append(level)
+
+    stages = [[] for level in range(max(levels) + 1)] if len(levels) > 0 else []
+    for system, level in zip(systems, levels):
+        stages[level].append(system)
+    return stages
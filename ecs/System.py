@@ -1,9 +1,28 @@
+from .Component import getMask, getTypeId
+
 class System(object):
     # Represents a system that processes entities
 
     def __init__(self):
         self.requirements = []
+        # Components (and shared resources such as 'Events') the system reads and
+        # writes besides its requirements. Leaving writes as None means the system
+        # may touch anything, so the Scheduler never runs it alongside another.
+        self.reads = ()
+        self.writes = None
+        # The system runs on every tickDivisor'th world tick, offset by tickPhase.
+        # Leaving the phase as None lets the world stagger it against the others.
+        # Event driven systems also skip ticks when nothing has been queued.
+        self.tickDivisor = 1
+        self.tickPhase = None
+        self.eventDriven = False
+        self.elapsed = 0
+        # The change version when the system last started running
+        self.lastRun = 0
         self.world = None
+        self._mask = None
+        self._typeIds = ()
+        self._maskRequirements = None
         self.eventQueue = []
 
     def onAttach(self, world):
@@ -11,22 +30,40 @@ class System(object):
         pass
 
     def getProcessableEntities(self, world):
-        entities = world.getAllEntities()
-        entitiesToProcess = []
-        # if we have specific requirements, filter those entities
+        # if we have specific requirements, use the world's query index
         if len(self.requirements) > 0:
-            for entity in entities:
-                applicable = True
-                for requirement in self.requirements:
-                    applicable = applicable and entity.hasComponent(requirement)
-
-                if applicable:
-                    entitiesToProcess.append(entity)
-
-            return tuple(entitiesToProcess)
+            return world.getEntitiesWithMask(self.getMask())
         else:
             # if we have no requirements, process all entities
-            return tuple(entities)
+            return tuple(world.getAllEntities())
+
+    def getChangedEntities(self, entities, componentName):
+        # The entities whose component, or set of components, changed since
+        # the system last ran. Components only record the changes they are
+        # told about, see Component.markChanged.
+        typeId = getTypeId(componentName)
+        since = self.lastRun
+        return [entity for entity in entities
+            if entity.changed > since or entity.getComponentById(typeId).changed > since]
+
+    def getMask(self):
+        # Compile the requirements to a component mask, recompiling if they change
+        if self._maskRequirements is not self.requirements:
+            self._mask = getMask(self.requirements)
+            self._typeIds = tuple(getTypeId(name) for name in self.requirements)
+            self._maskRequirements = self.requirements
+        return self._mask
+
+    def getTypeIds(self):
+        # The type ids of the requirements, in order, for getComponentById
+        self.getMask()
+        return self._typeIds
+
+    def takeElapsed(self):
+        # Returns the time accumulated since the system last ran
+        elapsed = self.elapsed
+        self.elapsed = 0
+        return elapsed
 
     def process(self, entities, dt):
         # Logic for processing entities
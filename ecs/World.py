@@ -1,52 +1,189 @@
+from fractions import gcd
 from .Entity import Entity
+from .Component import getMask, currentVersion
 from .GroupManager import GroupManager
+from .CommandBuffer import CommandBuffer
 from .eventQueue import PubSub
 
 class World(PubSub, object):
     def __init__(self):
         super(World, self).__init__()
         self.idCounter = 0
+        # Destroyed ids are recycled, and their generation bumped so that
+        # stale handles can be detected.
+        self.freeIds = []
+        self.generations = []
+        self.componentPools = {}
         self.entities = {}
         self.systems = []
         self.managers = { 'Group': GroupManager(self) }
+        # Maps a component mask to the entities which have all of its components,
+        # so queries cost the size of the result rather than the whole world.
+        # Results are cached until the membership of the query changes.
+        self.queries = {}
+        self.queryResults = {}
+        self.commandBuffer = CommandBuffer(self)
+        self.scheduler = None
+        # Counts updates, and converts system tick rates into divisors
+        self.tick = 0
+        self.tickRate = 60
+        # Called as hook(world, system, entities) around every system run
+        self.preSystemHooks = []
+        self.postSystemHooks = []
 
 
     def createEntity(self):
-        entity = Entity(self.idCounter, self)
-        self.idCounter += 1
-        return entity
+        if len(self.freeIds) > 0:
+            id = self.freeIds.pop()
+        else:
+            id = self.idCounter
+            self.idCounter += 1
+            self.generations.append(0)
+
+        # Entity objects are never reused, so anything still holding a destroyed
+        # one sees an empty entity rather than whichever one took its id
+        return Entity(id, self, self.generations[id])
+
+    def createComponent(self, componentClass, *args, **kwargs):
+        # Reuse a component released by a destroyed entity, if there is one
+        pool = self.componentPools.get(componentClass)
+        if pool:
+            component = pool.pop()
+            component.__init__(*args, **kwargs)
+            return component
+        return componentClass(*args, **kwargs)
+
+    def releaseComponent(self, entity, componentName):
+        # Removes a component from an entity and pools it for createComponent
+        component = entity.getComponent(componentName)
+        entity.removeComponent(componentName)
+        self.poolComponent(component)
+
+    def poolComponent(self, component):
+        component.entity = None
+        self.componentPools.setdefault(component.__class__, []).append(component)
+
+    def destroyEntity(self, entity):
+        if self.entities.get(entity.id) is not entity:
+            raise ValueError('Attempted to destroy an entity which isn\'t in this world')
+        del self.entities[entity.id]
+        for mask, matches in self.queries.iteritems():
+            if entity.id in matches:
+                del matches[entity.id]
+                self.queryResults.pop(mask, None)
+        for manager in self.managers.values():
+            if hasattr(manager, 'onEntityRemoved'):
+                manager.onEntityRemoved(entity)
+
+        for component in entity.components:
+            if component is not None:
+                self.poolComponent(component)
+
+        self.generations[entity.id] += 1
+        self.freeIds.append(entity.id)
+        entity.reset(None)
 
 
     def addEntity(self, entity):
         self.entities[entity.id] = entity
+        self.onEntityChanged(entity)
 
 
     def getEntity(self, id):
         return self.entities[id]
 
+    def resolveTarget(self, target):
+        # Targeted events address entities by id
+        return self.entities.get(target) if target is not None else None
+
+    def resolve(self, handle):
+        # Returns the entity a handle refers to, or None if it has been destroyed
+        entity = self.entities.get(handle.id)
+        if entity is not None and entity.generation == handle.generation:
+            return entity
+        return None
+
+    def isAlive(self, handle):
+        return self.resolve(handle) is not None
+
 
     def getAllEntities(self):
         return self.entities.values()
 
     def getEntitiesWithComponents(self, componentNames):
-        entities = self.getAllEntities()
-        entitiesToProcess = []
         # if we have specific requirements, filter those entities
         if len(componentNames) > 0:
-            for entity in entities:
-                applicable = True
-                for componentName in componentNames:
-                    applicable = applicable and entity.hasComponent(componentName)
-
-                if applicable:
-                    entitiesToProcess.append(entity)
-
-            return tuple(entitiesToProcess)
-
-    def addSystem(self, system):
+            return self.getEntitiesWithMask(getMask(componentNames))
+
+    def getEntitiesWithMask(self, mask):
+        results = self.queryResults.get(mask)
+        if results is None:
+            if mask not in self.queries:
+                self.queries[mask] = self.buildQuery(mask)
+            results = self.queryResults[mask] = tuple(self.queries[mask].values())
+        return results
+
+    def buildQuery(self, mask):
+        matches = {}
+        for entity in self.getAllEntities():
+            if entity.signature & mask == mask:
+                matches[entity.id] = entity
+        return matches
+
+    def onEntityChanged(self, entity):
+        # Called whenever an entity's set of components changes, or a
+        # component changes in a way managers index on (e.g. Drawable.layer)
+        if self.entities.get(entity.id) is not entity:
+            return
+        self.updateQueries(entity)
+        for manager in self.managers.values():
+            if hasattr(manager, 'onEntityChanged'):
+                manager.onEntityChanged(entity)
+
+    def updateQueries(self, entity):
+        signature = entity.signature
+        for mask, matches in self.queries.iteritems():
+            if signature & mask == mask:
+                if entity.id not in matches:
+                    matches[entity.id] = entity
+                    self.queryResults.pop(mask, None)
+            elif entity.id in matches:
+                del matches[entity.id]
+                self.queryResults.pop(mask, None)
+
+    def addSystem(self, system, divisor=None, rate=None, phase=None):
+        # A system can be slowed down to a rate in Hz, or to every nth tick
+        if rate is not None:
+            divisor = max(1, int(round(self.tickRate / float(rate))))
+        if divisor is not None:
+            system.tickDivisor = divisor
+        if phase is not None:
+            system.tickPhase = phase
+        if system.tickPhase is None:
+            system.tickPhase = self.choosePhase(system.tickDivisor)
         self.systems.append(system)
         system.onAttach(self)
 
+    def choosePhase(self, divisor):
+        # Pick the phase which shares the fewest ticks with the other slowed
+        # down systems, so expensive systems don't all run on the same tick.
+        if divisor == 1:
+            return 0
+        load = [0] * divisor
+        for other in self.systems:
+            if other.tickDivisor == 1:
+                continue
+            common = gcd(divisor, other.tickDivisor)
+            for phase in range(divisor):
+                if (phase - other.tickPhase) % common == 0:
+                    load[phase] += 1
+        return load.index(min(load))
+
+    def isDue(self, system):
+        if system.eventDriven and len(system.eventQueue) == 0:
+            return False
+        return (self.tick - system.tickPhase) % system.tickDivisor == 0
+
 
     def getSystem(self, systemName):
         for system in self.systems:
@@ -57,8 +194,40 @@ class World(PubSub, object):
     def getManager(self, managerType):
         return self.managers[managerType]
 
+    def addManager(self, managerType, manager):
+        self.managers[managerType] = manager
+        for entity in self.getAllEntities():
+            if hasattr(manager, 'onEntityChanged'):
+                manager.onEntityChanged(entity)
+        return manager
+
+    def getCommandBuffer(self):
+        return self.commandBuffer
+
+    def setScheduler(self, scheduler):
+        self.scheduler = scheduler
+
+    def runSystem(self, system, entities, dt):
+        for hook in self.preSystemHooks:
+            hook(self, system, entities)
+        version = currentVersion()
+        system.process(entities, dt)
+        system.lastRun = version
+        for hook in self.postSystemHooks:
+            hook(self, system, entities)
+
     def update(self, dt):
         self.processEventQueue()
+        self.commandBuffer.flush()
         for system in self.systems:
-            entities = system.getProcessableEntities(self)
-            system.process(entities, dt)
+            system.elapsed += dt
+        if self.scheduler is not None:
+            self.scheduler.run(dt)
+        else:
+            for system in self.systems:
+                if not self.isDue(system):
+                    continue
+                self.runSystem(system, system.getProcessableEntities(self), system.takeElapsed())
+                # Sync point: apply the structural changes the system deferred
+                self.commandBuffer.flush()
+        self.tick += 1
@@ -1,4 +1,7 @@
 from World import World
-from Component import Component
+from Component import Component, getTypeId, getMask, nextVersion, currentVersion
 from System import System
-from Entity import Entity
+from Entity import Entity, EntityHandle
+from CommandBuffer import CommandBuffer
+from Scheduler import Scheduler
+from Profiler import Profiler
@@ -3,6 +3,7 @@ class PubSub(object):
         super(PubSub, self).__init__()
         self.eventQueue = []
         self.handlers = {}
+        self.targetedHandlers = {}
 
     def on(self, eventTypes, handler):
         if not hasattr(eventTypes, '__iter__'):
@@ -13,6 +14,32 @@ class PubSub(object):
                 self.handlers[eventType] = set()
             self.handlers[eventType].add(handler)
 
+    def off(self, eventTypes, handler=None):
+        # Remove one handler, or every handler if none is given
+        if not hasattr(eventTypes, '__iter__'):
+            eventTypes = (eventTypes,)
+
+        for eventType in eventTypes:
+            if eventType in self.handlers:
+                if handler is None:
+                    self.handlers[eventType].clear()
+                else:
+                    self.handlers[eventType].discard(handler)
+
+    def onTargeted(self, eventTypes, handler):
+        # The handler is called as handler(event, target) with whatever the
+        # event's target attribute resolves to, skipping unresolvable targets.
+        if not hasattr(eventTypes, '__iter__'):
+            eventTypes = (eventTypes,)
+
+        for eventType in eventTypes:
+            if eventType not in self.targetedHandlers:
+                self.targetedHandlers[eventType] = set()
+            self.targetedHandlers[eventType].add(handler)
+
+    def resolveTarget(self, target):
+        return target
+
     def post(self, events):
         if not hasattr(events, '__iter__'):
             events = (events,)
@@ -24,4 +51,9 @@ class PubSub(object):
             if eventType in self.handlers:
                 for handler in self.handlers[eventType]:
                     handler(event)
+            if eventType in self.targetedHandlers:
+                target = self.resolveTarget(getattr(event, 'target', None))
+                if target is not None:
+                    for handler in self.targetedHandlers[eventType]:
+                        handler(event, target)
         del self.eventQueue[:]
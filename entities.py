@@ -5,7 +5,7 @@ from util.enums import keys
 from util import enums
 from newvector import Vector2
 from util import resource_path
-from util import Asset, SpriteData
+from util import Asset, SpriteData, TextRenderer
 
 # Load assets
 # Stairs
@@ -30,7 +30,7 @@ termSprite = 'terminal.png'
 
 # Text
 assetManager = Asset.Manager.getInstance()
-silkScreen = assetManager.getFont('silkscreen.ttf')
+silkScreen = TextRenderer(assetManager.getFont('silkscreen.ttf'))
 
 ghostSprite = 'ghost.png'
 ghostRunningSprite = 'ghost_run-sheet.png'
@@ -44,6 +44,7 @@ def createGhost(world, position):
     playerEntity.addComponent(component.Velocity((0, 0)))
     playerEntity.addComponent(component.Acceleration())
     playerEntity.addComponent(component.Visible())
+    playerEntity.addComponent(component.Concealable())
     playerState = playerEntity.addComponent(component.State(hiding=False, moving=False))
     playerSpriteState = playerEntity.addComponent(component.SpriteState(idle=ghostSprite, moving=ghostRunningSprite))
     playerEntity.addComponent(component.Collidable())
@@ -84,6 +85,7 @@ def createGhost(world, position):
                         valid = target.y > liftPosition.y
                     if valid:
                         selfPosition.y, selfPosition.x = target.y,  target.x
+                        entity.getComponent('Position').markChanged()
 
     playerInputHandler = playerEntity.addComponent(component.EventHandler())
     playerInputHandler.attach(pygame.KEYDOWN, handleInput)
@@ -223,8 +225,11 @@ def createGuard(world, position, accOffset=0, cycleTime=5):
     return guardEntity
 
 def createText(world, position, text):
-    renderedText = silkScreen.render(text, False, (255,255,255))
-    Asset.Manager.getInstance().putSprite(text, SpriteData(renderedText))
-    blittedText = auxFunctions.create(world, position=position, sprite=text, layer=6)
+    blittedText = auxFunctions.create(world, position=position)
+    blittedText.addComponent(world.createComponent(component.Drawable, silkScreen.getSprite(text), 6))
     world.addEntity(blittedText)
     return blittedText
+
+def setText(entity, text):
+    # Cheap enough to call every frame for text which changes, e.g. a timer
+    entity.getComponent('Drawable').set(silkScreen.getSprite(text))
@@ -1,10 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import math, os, pygame, random, json, sys
+import math, os, pygame, random, json, sys, atexit
 import component
 import auxFunctions
 import entities
+import snapshot
 from collections import OrderedDict
 from pygame.locals import *
 from newvector import Vector2
@@ -14,7 +15,7 @@ from pytmx.util_pygame import load_pygame
 from util.enums import keys
 from util import enums
 from util import resource_path
-from util import Asset, SpriteData
+from util import Asset, SpriteData, VectorStore, Presenter, FramePacer
 
 
 with open(resource_path('options.json'), "r") as f:
@@ -28,6 +29,7 @@ except:
 
 gamescreen = "menu"
 worlds = OrderedDict()
+levelCheckpoints = {}
 
 
 def quitHandler(event):
@@ -47,6 +49,9 @@ def quitHandler(event):
 def createWorld(levelFile):
 	world = World()
 	world.on([QUIT, KEYDOWN], quitHandler)
+	# Keep physics bodies in numpy arrays when we can
+	if VectorStore.isAvailable():
+		world.addManager('Vector', VectorStore(world, ('Position', 'Velocity', 'Acceleration')))
 
 	def gameOverHandler(event):
 		if event.type == enums.GAMEOVER:
@@ -72,7 +77,7 @@ def createWorld(levelFile):
 	for index, surface in enumerate(mapData.getSurfaces()):
 		fileName = levelFile + str(index)
 		result = assetManager.putSprite(fileName, SpriteData(surface))
-		mapEntity = auxFunctions.create(world, position=(0,0), sprite=fileName, layer=index)
+		mapEntity = auxFunctions.create(world, position=(0,0), sprite=fileName, layer=index, static=True)
 		world.addEntity(mapEntity)
 
 	cameraEntity = world.createEntity()
@@ -83,11 +88,15 @@ def createWorld(levelFile):
 	camera.type = 'follow'
 	world.addEntity(cameraEntity)
 
+	# Rates given to addSystem are relative to the simulation rate
+	world.tickRate = options.get("SIM_RATE", 60)
+	world.addSystem(PositionHistorySystem())
 	world.addSystem(InputSystem())
 	world.addSystem(PlayerInputSystem())
 	world.addSystem(InteractionSystem())
 	world.addSystem(CoverSystem())
-	world.addSystem(RadarSystem())
+	# Raycasting is costly, so guards only look around at 15Hz
+	world.addSystem(RadarSystem(), rate=15)
 	world.addSystem(ScriptSystem())
 	world.addSystem(PhysicsSystem())
 	world.addSystem(TileCollisionSystem(mapData))
@@ -96,6 +105,10 @@ def createWorld(levelFile):
 	world.addSystem(VelocityFacingSystem())
 	world.addSystem(AnimationSystem())
 	world.addSystem(CameraSystem())
+
+	# Run systems which don't share data concurrently, if asked to
+	if options.get("WORKERS", 0) > 0:
+		world.setScheduler(Scheduler(world, options["WORKERS"]))
 	return world
 
 def setupWorld():
@@ -108,7 +121,7 @@ def setupWorld():
 	world.on([enums.LEVELCOMPLETE], levelCompleteHandler)
 
 	city = 'cityscape.png'
-	background = auxFunctions.create(world, position=(0,0), sprite=city, layer=-1)
+	background = auxFunctions.create(world, position=(0,0), sprite=city, layer=-1, static=True)
 	world.addEntity(background)
 
 	entities.createGhost(world, (8, 44))
@@ -130,7 +143,7 @@ def setupWorld():
 def level05():
 	world = createWorld('indoors3.tmx')
 	menuImage = 'cityscape.png'
-	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-1)
+	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-1, static=True)
 	world.addEntity(background)
 
 	entities.createGhost(world, (4,4))
@@ -189,7 +202,7 @@ def level04():
 def level03():
 	world = createWorld('outdoors3.tmx')
 	menuImage = 'cityscape.png'
-	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-1)
+	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-1, static=True)
 	world.addEntity(background)
 
 	entities.createGhost(world, (4,44))
@@ -214,7 +227,7 @@ def level03():
 def level02():
 	world = createWorld('outdoors2.tmx')
 	menuImage = 'cityscape.png'
-	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-1)
+	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-1, static=True)
 	world.addEntity(background)
 
 	entities.createGhost(world, (4,20))
@@ -235,7 +248,7 @@ def level02():
 def level01():
 	world = createWorld('outdoors1.tmx')
 	menuImage = 'cityscape.png'
-	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-1)
+	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-1, static=True)
 	world.addEntity(background)
 
 	def levelCompleteHandler(event):
@@ -259,11 +272,11 @@ def optionsMenu(display):
 	### NOTE: DON'T ADD ENTITES YET! ###
 	# See setupMenu for the comments on this :)
 	menuImage = 'cityscape.png'
-	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-2)
+	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-2, static=True)
 	world.addEntity(background)
 
 	menuText = pygame.image.load(os.path.join('assets', 'images', 'options.png'))
-	text = auxFunctions.create(world, position=(0,0), sprite=menuText, layer=-1)
+	text = auxFunctions.create(world, position=(0,0), sprite=menuText, layer=-1, static=True)
 	world.addEntity(text)
 
 	onImage = pygame.image.load(os.path.join("assets", "images", "on.png"))
@@ -316,6 +329,17 @@ def optionsMenu(display):
 	world.addSystem(InputSystem())
 	return world
 
+def loadLevel(levelFunc):
+	# Levels are built once, then restarted by restoring their starting snapshot.
+	# The sound setting is baked into the world, so rebuild if it has changed.
+	if levelFunc in levelCheckpoints:
+		world, data, sound = levelCheckpoints[levelFunc]
+		if sound == options['SOUND']:
+			return snapshot.restoreSnapshot(world, data)
+	world = levelFunc()
+	levelCheckpoints[levelFunc] = (world, snapshot.takeSnapshot(world), options['SOUND'])
+	return world
+
 def gameOver():
 	world = World()
 	world.on([QUIT, KEYDOWN], quitHandler)
@@ -331,7 +355,7 @@ def gameOver():
 		if event.type == pygame.KEYDOWN:
 			if event.key in keys:
 				if keys[event.key] in ("Interact", "Enter"):
-					worlds[gamescreen] = level01()
+					worlds[gamescreen] = loadLevel(level01)
 
 	inputEventHandler.attach(pygame.KEYDOWN, move)
 	world.addEntity(inputEntity)
@@ -402,12 +426,12 @@ def setupMenu(display):
 
 	# Add the background image
 	menuImage = 'cityscape.png'
-	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-2)
+	background = auxFunctions.create(world, position=(0,0), sprite=menuImage, layer=-2, static=True)
 	world.addEntity(background)
 
 	# The text that goes on top of the world is here.
 	menuText = 'menu.png'
-	text = auxFunctions.create(world, position=(0,0), sprite=menuText, layer=-1)
+	text = auxFunctions.create(world, position=(0,0), sprite=menuText, layer=-1, static=True)
 	world.addEntity(text)
 
 	# Add the movable component
@@ -427,7 +451,7 @@ def setupMenu(display):
 					currentPosition.value += Vector2(0, 13)
 			elif keys[event.key] in ("Interact", "Enter"):
 				if currentPosition.value == Vector2(2,22):
-					worlds["level"] = level01()
+					worlds["level"] = loadLevel(level01)
 					gamescreen = "level"
 				elif currentPosition.value == Vector2(2,35):
 					worlds["options"] = optionsMenu(display)
@@ -445,13 +469,29 @@ def setupMenu(display):
 	world.addSystem(InputSystem())
 	return world
 
+def setDisplayMode(size, vsync):
+	# Only newer pygame versions can ask for vsync, older ones don't take the argument
+	if vsync:
+		try:
+			return pygame.display.set_mode(size, 0, 0, 0, 1), True
+		except (TypeError, pygame.error):
+			pass
+	return pygame.display.set_mode(size), False
+
+def dumpFrameStats(fileName, presenter, pacer):
+	with open(fileName, 'w') as f:
+		json.dump({
+			'present': presenter.summary(),
+			'pacing': pacer.summary()
+		}, f, indent=4)
+
 def main():
 	global gamescreen, worlds
 	pygame.init()
 
 	outputSize = (options["SIZE"], options["SIZE"])
 	#Create the window and caption etc.
-	display = pygame.display.set_mode(outputSize)
+	display, vsync = setDisplayMode(outputSize, options.get("VSYNC", False))
 	pygame.display.set_caption('Ghost')
 	pygame.mouse.set_visible(0)
 
@@ -460,17 +500,33 @@ def main():
 	screen.fill((0,0,0))
 	# screen = screen.convert_alpha()
 
-	# Initalise the game loop clock
-	clock = pygame.time.Clock()
-
 	# Create the world
 	# Later this could be delegated to a "State" object.
 	worlds["menu"] = setupMenu(screen)
 
-	# Set up our render system, which we share between all worlds
-	renderSystem = RenderSystem(screen)
-
-	dt = (1.0 / 60.0) * 1000;
+	# Scales the screen up to the window
+	presenter = Presenter(display, screen, options.get("SCALE_FILTER", "nearest"))
+
+	# Set up our render system, which we share between all worlds. Dirty rects
+	# are only worth tracking if the presenter can show them on their own.
+	dirtyRects = options.get("DIRTY_RECTS", False) and presenter.canPresentRects()
+	renderSystem = RenderSystem(screen, dirtyRects)
+
+	# Holds the loop to the frame cap rather than drawing as fast as possible
+	pacer = FramePacer(options.get("FRAME_CAP", 60), vsync)
+
+	# Optionally record per-system timings, written out when the game exits
+	profiler = None
+	if options.get("PROFILE", False):
+		profiler = Profiler()
+		atexit.register(profiler.dumpCSV, 'profile.csv')
+		atexit.register(profiler.dumpJSON, 'profile.json')
+		presenter.profiler = profiler
+		pacer.profiler = profiler
+		atexit.register(dumpFrameStats, 'frames.json', presenter, pacer)
+
+	# The simulation runs at a fixed rate, which can be lower than the frame rate
+	dt = (1.0 / options.get("SIM_RATE", 60)) * 1000;
 	accumulator = 0
 	currentTime = pygame.time.get_ticks()
 
@@ -484,6 +540,8 @@ def main():
 		currentWorld = worlds[gamescreen]
 		worlds[gamescreen].post(pygame.event.get())
 		renderSystem.world = worlds[gamescreen]
+		if profiler is not None:
+			profiler.attach(worlds[gamescreen])
 		while accumulator >= dt:
 			# If we switched world due to events, stop updating mid-cycle
 			if currentWorld is not worlds[gamescreen]:
@@ -493,9 +551,13 @@ def main():
 
 		# We do rendering outside the regular update loop for performance reasons
 		# See: http://gafferongames.com/game-physics/fix-your-timestep/
+		# Draw the part of the way to the next step we have already covered
+		renderSystem.alpha = min(1.0, accumulator / dt)
 		entities = renderSystem.getProcessableEntities(worlds[gamescreen])
-		renderSystem.process(entities, dt / 1000.0)
-		display.blit(pygame.transform.scale(screen, outputSize), (0, 0))
-		pygame.display.flip()
+		worlds[gamescreen].runSystem(renderSystem, entities, dt / 1000.0)
+		presenter.present(renderSystem.dirtyRects)
+		pacer.endFrame()
+		if profiler is not None:
+			profiler.endFrame()
 
 if __name__ == '__main__': main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+'''
+Steps game worlds as fast as possible, without a window, rendering or the
+60Hz frame loop, for soak-testing guard AI and collisions and for measuring
+pure simulation throughput.
+
+Usage (from the repository root):
+    python headless.py level01 --ticks 10000
+    python headless.py level03 --press 10:Right:60 --press 75:Interact:15
+'''
+import os, time, argparse
+from collections import namedtuple
+
+# The dummy drivers must be chosen before pygame is initialised
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+import pygame
+
+Result = namedtuple('Result', ['level', 'outcome', 'ticks', 'elapsed'])
+
+game = None
+enums = None
+
+def setup():
+    # game and entities load images at import time, which needs a video mode
+    global game, enums
+    if game is None:
+        pygame.init()
+        pygame.display.set_mode((1, 1), 0, 32)
+        import game as gameModule
+        from util import enums as enumsModule
+        game = gameModule
+        enums = enumsModule
+    return game
+
+def keyNames():
+    from util.enums import keys
+    return dict((name, key) for key, name in keys.iteritems())
+
+def press(tick, keyName, duration=1):
+    # A key held down at tick for duration ticks, as (tick, event) pairs
+    key = keyNames()[keyName]
+    return [
+        (tick, pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode=u'')),
+        (tick + duration, pygame.event.Event(pygame.KEYUP, key=key, mod=0))
+    ]
+
+def loadWorld(levelName, sound=False):
+    setup()
+    game.options['SOUND'] = sound
+    return game.loadLevel(getattr(game, levelName))
+
+def simulate(levelName, script=(), ticks=3600, dt=None, stopOnOutcome=True):
+    '''
+    Builds the named level function from game.py and steps it, posting each
+    scripted (tick, event) pair on its tick. Stops at the first GAMEOVER or
+    LEVELCOMPLETE when stopOnOutcome is set. Steps default to the SIM_RATE
+    from options.json.
+    '''
+    world = loadWorld(levelName)
+    if dt is None:
+        dt = 1.0 / game.options.get('SIM_RATE', 60)
+
+    # Replace the game's screen-switching handlers with a recorder
+    outcomes = []
+    def recordOutcome(event):
+        outcomes.append('GAMEOVER' if event.type == enums.GAMEOVER else 'LEVELCOMPLETE')
+    world.off([enums.GAMEOVER, enums.LEVELCOMPLETE])
+    world.on([enums.GAMEOVER, enums.LEVELCOMPLETE], recordOutcome)
+
+    inputs = {}
+    for tick, event in script:
+        inputs.setdefault(tick, []).append(event)
+
+    tick = 0
+    start = time.time()
+    while tick < ticks:
+        if tick in inputs:
+            world.post(inputs[tick])
+        world.update(dt)
+        tick += 1
+        if stopOnOutcome and len(outcomes) > 0:
+            break
+    elapsed = time.time() - start
+
+    outcome = outcomes[0] if len(outcomes) > 0 else None
+    return Result(levelName, outcome, tick, elapsed)
+
+def parsePress(value):
+    # tick:Key[:duration], using the key names from util.enums.keys
+    parts = value.split(':')
+    duration = int(parts[2]) if len(parts) > 2 else 1
+    return press(int(parts[0]), parts[1], duration)
+
+def main():
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description='Run a level without rendering, as fast as possible.')
+    parser.add_argument('level', help='a level function from game.py, e.g. level01 or setupWorld')
+    parser.add_argument('--ticks', type=int, default=3600)
+    parser.add_argument('--press', action='append', default=[], metavar='TICK:KEY[:DURATION]')
+    parser.add_argument('--keep-going', action='store_true', help='don\'t stop at GAMEOVER/LEVELCOMPLETE')
+    args = parser.parse_args()
+
+    script = []
+    for value in args.press:
+        script += parsePress(value)
+
+    result = simulate(args.level, script, args.ticks, stopOnOutcome=not args.keep_going)
+    rate = result.ticks / result.elapsed if result.elapsed > 0 else float('inf')
+    print '%s: %s after %d ticks in %.3fs (%.0f ticks/s)' % \
+        (result.level, result.outcome or 'no outcome', result.ticks, result.elapsed, rate)
+
+if __name__ == '__main__': main()
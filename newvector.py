@@ -13,7 +13,7 @@ class Vector2(object):
             if type(x_or_pair) == tuple:
                 self.x = x_or_pair[0]
                 self.y = x_or_pair[1]
-            elif type(x_or_pair) == Vector2:
+            elif isinstance(x_or_pair, Vector2):
                 self.x = x_or_pair.x
                 self.y = x_or_pair.y
             else:
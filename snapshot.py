@@ -0,0 +1,488 @@
+'''
+Compact binary checkpoints of a World: its entities and their component data,
+its groups and its pending events.
+
+A snapshot stores data, not objects. Sprites are stored by their asset key, and
+components which only hold code (scripts and event handlers) are stored by
+name. A snapshot can therefore only be restored into the world it was taken
+from, or into one built by the same level function, which supplies the code.
+'''
+import struct
+import pygame
+import component
+from ecs import Entity, EntityHandle
+from newvector import Vector2
+from util import Asset
+
+MAGIC = 'GSNP'
+VERSION = 1
+
+class Writer(object):
+    def __init__(self):
+        self.chunks = []
+        self.strings = {}
+        self.spriteKeys = None
+
+    def pack(self, format, *values):
+        self.chunks.append(struct.pack(format, *values))
+
+    def uint(self, value):
+        self.pack('<I', value)
+
+    def string(self, value):
+        # Strings are written once, into a table at the start of the snapshot
+        if value not in self.strings:
+            self.strings[value] = len(self.strings)
+        self.pack('<I', self.strings[value])
+
+    def vector(self, value):
+        self.pack('<dd', value[0], value[1])
+
+    def value(self, value):
+        if value is None:
+            self.chunks.append('N')
+        elif value is True:
+            self.chunks.append('T')
+        elif value is False:
+            self.chunks.append('F')
+        elif isinstance(value, (int, long)):
+            self.pack('<cq', 'i', value)
+        elif isinstance(value, float):
+            self.pack('<cd', 'd', value)
+        elif isinstance(value, str):
+            self.chunks.append('s')
+            self.string(value)
+        elif isinstance(value, unicode):
+            self.chunks.append('u')
+            self.string(value.encode('utf-8'))
+        elif isinstance(value, Vector2):
+            self.chunks.append('v')
+            self.vector(value)
+        elif isinstance(value, tuple):
+            self.pack('<cI', 't', len(value))
+            for item in value:
+                self.value(item)
+        else:
+            raise ValueError('Cannot snapshot a value of type %s' % type(value).__name__)
+
+    def getData(self):
+        table = sorted(self.strings, key=self.strings.get)
+        header = [MAGIC, struct.pack('<BI', VERSION, len(table))]
+        for string in table:
+            header.append(struct.pack('<I', len(string)))
+            header.append(string)
+        return ''.join(header + self.chunks)
+
+
+class Reader(object):
+    def __init__(self, data):
+        if data[:4] != MAGIC:
+            raise ValueError('Not a world snapshot')
+        self.data = data
+        self.offset = 4
+        version, count = self.unpack('<BI')
+        if version != VERSION:
+            raise ValueError('Unsupported snapshot version %d' % version)
+        self.strings = []
+        for index in range(count):
+            length, = self.unpack('<I')
+            # Interned, so state names compare by identity like the literals do
+            self.strings.append(intern(self.data[self.offset:self.offset + length]))
+            self.offset += length
+        # Callbacks which need every entity to exist before they can run
+        self.fixups = []
+
+    def unpack(self, format):
+        values = struct.unpack_from(format, self.data, self.offset)
+        self.offset += struct.calcsize(format)
+        return values
+
+    def uint(self):
+        return self.unpack('<I')[0]
+
+    def string(self):
+        return self.strings[self.unpack('<I')[0]]
+
+    def vector(self):
+        return Vector2(*self.unpack('<dd'))
+
+    def value(self):
+        tag = self.data[self.offset]
+        self.offset += 1
+        if tag == 'N':
+            return None
+        elif tag == 'T':
+            return True
+        elif tag == 'F':
+            return False
+        elif tag == 'i':
+            return self.unpack('<q')[0]
+        elif tag == 'd':
+            return self.unpack('<d')[0]
+        elif tag == 's':
+            return self.string()
+        elif tag == 'u':
+            return self.string().decode('utf-8')
+        elif tag == 'v':
+            return self.vector()
+        elif tag == 't':
+            return tuple(self.value() for index in range(self.uint()))
+        raise ValueError('Corrupt snapshot')
+
+
+# Codecs write a component's data, and read it back either into an existing
+# component of the same class or, when the entity has lost it, a new one.
+codecs = {}
+
+def registerCodec(componentClass, write, read):
+    codecs[componentClass.__name__] = (write, read)
+
+def writeNothing(writer, component):
+    pass
+
+def readMarker(componentClass):
+    def read(reader, existing):
+        return existing if existing is not None else componentClass()
+    return read
+
+def readCode(componentClass):
+    def read(reader, existing):
+        if existing is None:
+            raise ValueError('Cannot recreate %s from a snapshot' % componentClass.__name__)
+        return existing
+    return read
+
+def writeVector(writer, vector):
+    writer.vector(vector.value)
+
+def readVector(componentClass):
+    def read(reader, existing):
+        value = reader.vector()
+        if existing is None:
+            return componentClass(value)
+        existing.value = value
+        if isinstance(existing, component.Position):
+            # Don't draw the restored entity sliding from its abandoned position
+            existing.previous = None
+        return existing
+    return read
+
+def writeConstant(writer, constant):
+    writer.value(constant.value)
+
+def readConstant(componentClass):
+    def read(reader, existing):
+        value = reader.value()
+        if existing is None:
+            return componentClass(value)
+        existing.value = value
+        return existing
+    return read
+
+def writeState(writer, state):
+    writer.uint(len(state.state))
+    for key, value in state.state.iteritems():
+        writer.string(key)
+        writer.value(value)
+
+def readStateValues(reader):
+    values = {}
+    for index in range(reader.uint()):
+        key = reader.string()
+        values[key] = reader.value()
+    return values
+
+def readState(reader, existing):
+    values = readStateValues(reader)
+    state = existing if existing is not None else component.State()
+    state.state = values
+    return state
+
+def writeSpriteState(writer, spriteState):
+    writeState(writer, spriteState)
+    writer.value(spriteState.current)
+    writer.value(spriteState.last)
+
+def readSpriteState(reader, existing):
+    values = readStateValues(reader)
+    spriteState = existing if existing is not None else component.SpriteState()
+    spriteState.state = values
+    spriteState.current = reader.value()
+    spriteState.last = reader.value()
+    return spriteState
+
+def writeDrawable(writer, drawable):
+    writer.value(getSpriteKey(writer, drawable.sprite.spriteData))
+    writer.pack('<I?', drawable.sprite.currentFrame, drawable.sprite.loop)
+    writer.value(drawable.layer)
+    writer.pack('<?', drawable.flipped)
+    writer.vector(drawable.offset)
+
+def readDrawable(reader, existing):
+    spriteKey = reader.value()
+    currentFrame, loop = reader.unpack('<I?')
+    layer = reader.value()
+    flipped, = reader.unpack('<?')
+    offset = reader.vector()
+
+    assetManager = Asset.Manager.getInstance()
+    if existing is None:
+        if spriteKey is None:
+            raise ValueError('Cannot recreate a Drawable whose sprite has no asset key')
+        drawable = component.Drawable(assetManager.getSprite(spriteKey), layer, offset)
+    else:
+        drawable = existing
+        if spriteKey is not None and drawable.sprite.spriteData is not assetManager.get(spriteKey):
+            drawable.set(assetManager.getSprite(spriteKey))
+        drawable.layer = layer
+        drawable.offset = offset
+    drawable.sprite.currentFrame = currentFrame
+    drawable.sprite.loop = loop
+    drawable.image = drawable.sprite.current()
+    drawable.flipped = flipped
+    return drawable
+
+def writeAnimation(writer, animation):
+    writer.value(animation.framerate)
+    writer.pack('<?dI', animation.loop, animation.accumulator, animation.currentFrame)
+
+def readAnimation(reader, existing):
+    animation = existing if existing is not None else component.Animation()
+    animation.framerate = reader.value()
+    animation.loop, animation.accumulator, animation.currentFrame = reader.unpack('<?dI')
+    return animation
+
+def writeCamera(writer, camera):
+    writer.pack('<II', *camera.getViewport().get_size())
+    writer.value(tuple(camera.viewportPosition))
+    writer.value(camera.layer)
+    writer.value(camera.type)
+
+def readCamera(reader, existing):
+    viewportSize = reader.unpack('<II')
+    viewportPosition = reader.value()
+    layer = reader.value()
+    type = reader.value()
+    camera = existing if existing is not None else component.Camera(viewportSize)
+    if camera.getViewport().get_size() != viewportSize:
+        camera.setViewport(viewportSize)
+    camera.viewportPosition = viewportPosition
+    camera.layer = layer
+    camera.type = type
+    return camera
+
+def writePlayerInput(writer, playerInput):
+    writer.pack('<?', playerInput.enabled)
+
+def readPlayerInput(reader, existing):
+    playerInput = existing if existing is not None else component.PlayerInput()
+    playerInput.enabled, = reader.unpack('<?')
+    return playerInput
+
+def writeFacing(writer, facing):
+    writer.string(facing.direction)
+
+def readFacing(reader, existing):
+    facing = existing if existing is not None else component.Facing()
+    facing.direction = reader.string()
+    return facing
+
+def writeCover(writer, cover):
+    writer.value(tuple(cover.occupant) if cover.occupant is not None else None)
+
+def readCover(reader, existing):
+    cover = existing if existing is not None else component.Cover()
+    occupant = reader.value()
+    cover.occupant = EntityHandle(*occupant) if occupant is not None else None
+    return cover
+
+def writeConcealable(writer, concealable):
+    writer.value(concealable.cover)
+
+def readConcealable(reader, existing):
+    concealable = existing if existing is not None else component.Concealable()
+    concealable.cover = reader.value()
+    return concealable
+
+def writeCollidable(writer, collidable):
+    writer.uint(len(collidable.collisionSet))
+    for other in collidable.collisionSet:
+        writer.uint(other.id)
+
+def readCollidable(reader, existing):
+    collidable = existing if existing is not None else component.Collidable()
+    ids = [reader.uint() for index in range(reader.uint())]
+    def fixup(entities):
+        collidable.collisionSet = set(entities[id] for id in ids if id in entities)
+    reader.fixups.append(fixup)
+    return collidable
+
+def writeRadar(writer, radar):
+    # Targets are rebuilt by the RadarSystem every tick
+    targetGroups = radar.getTargetGroups()
+    writer.value(tuple(targetGroups) if isinstance(targetGroups, list) else targetGroups)
+
+def readRadar(reader, existing):
+    targetGroups = reader.value()
+    radar = existing if existing is not None else component.Radar(targetGroups)
+    radar.targetGroups = targetGroups
+    radar.targets.clear()
+    return radar
+
+for vectorClass in (component.Vector, component.Acceleration, component.Position,
+        component.LastPosition, component.Velocity, component.Dimension, component.TargetVelocity):
+    registerCodec(vectorClass, writeVector, readVector(vectorClass))
+for constantClass in (component.Constant, component.AccelerationConstant):
+    registerCodec(constantClass, writeConstant, readConstant(constantClass))
+for codeClass in (component.EventHandler, component.Interactable, component.Script):
+    registerCodec(codeClass, writeNothing, readCode(codeClass))
+registerCodec(component.Visible, writeNothing, readMarker(component.Visible))
+registerCodec(component.Static, writeNothing, readMarker(component.Static))
+registerCodec(component.State, writeState, readState)
+registerCodec(component.SpriteState, writeSpriteState, readSpriteState)
+registerCodec(component.Drawable, writeDrawable, readDrawable)
+registerCodec(component.Animation, writeAnimation, readAnimation)
+registerCodec(component.Camera, writeCamera, readCamera)
+registerCodec(component.PlayerInput, writePlayerInput, readPlayerInput)
+registerCodec(component.Facing, writeFacing, readFacing)
+registerCodec(component.Cover, writeCover, readCover)
+registerCodec(component.Concealable, writeConcealable, readConcealable)
+registerCodec(component.Collidable, writeCollidable, readCollidable)
+registerCodec(component.Radar, writeRadar, readRadar)
+
+def getSpriteKey(writer, spriteData):
+    if writer.spriteKeys is None:
+        assetManager = Asset.Manager.getInstance()
+        writer.spriteKeys = {}
+        for key, value in assetManager.map.iteritems():
+            if isinstance(value, Asset.SpriteData) and isinstance(key, basestring):
+                writer.spriteKeys[id(value)] = key
+    return writer.spriteKeys.get(id(spriteData))
+
+
+def takeSnapshot(world):
+    writer = Writer()
+    writer.uint(world.idCounter)
+    writer.uint(len(world.generations))
+    for generation in world.generations:
+        writer.uint(generation)
+    writer.uint(len(world.freeIds))
+    for id in world.freeIds:
+        writer.uint(id)
+
+    entities = world.getAllEntities()
+    writer.uint(len(entities))
+    for entity in entities:
+        components = [component for component in entity.components if component is not None]
+        writer.pack('<III', entity.id, entity.generation, len(components))
+        for component in components:
+            className = component.__class__.__name__
+            if className not in codecs:
+                raise ValueError('No snapshot codec for component %s' % className)
+            writer.string(className)
+            codecs[className][0](writer, component)
+
+    groups = world.getManager('Group').groups
+    writer.uint(len(groups))
+    for group, members in groups.iteritems():
+        writer.value(group)
+        writer.uint(len(members))
+        for entity in members:
+            writer.uint(entity.id)
+
+    writer.uint(len(world.eventQueue))
+    for event in world.eventQueue:
+        attributes = event.dict
+        writer.pack('<II', event.type, len(attributes))
+        for key, value in attributes.iteritems():
+            writer.string(key)
+            writer.value(value)
+
+    # Slowed down systems resume on the same ticks, with the same dt
+    writer.uint(world.tick)
+    writer.uint(len(world.systems))
+    for system in world.systems:
+        writer.pack('<d', system.elapsed)
+
+    return writer.getData()
+
+def restoreSnapshot(world, data):
+    reader = Reader(data)
+    idCounter = reader.uint()
+    generations = [reader.uint() for index in range(reader.uint())]
+    freeIds = [reader.uint() for index in range(reader.uint())]
+
+    records = []
+    for index in range(reader.uint()):
+        id, generation, count = reader.unpack('<III')
+        entity = world.entities.get(id)
+        components = []
+        for componentIndex in range(count):
+            className = reader.string()
+            existing = findComponent(entity, className) if entity is not None else None
+            components.append(codecs[className][1](reader, existing))
+        records.append((id, generation, entity, components))
+
+    # Entities created since the snapshot are destroyed as normal
+    ids = set(record[0] for record in records)
+    for entity in list(world.getAllEntities()):
+        if entity.id not in ids:
+            world.destroyEntity(entity)
+
+    restored = {}
+    for id, generation, entity, components in records:
+        if entity is None:
+            entity = Entity(id, world)
+        for component in entity.components:
+            if component is not None and component not in components:
+                component.entity = None
+        # Rebuild the entity outside the world, so it is only re-indexed once
+        world.entities.pop(id, None)
+        entity.reset(id, generation)
+        for component in components:
+            entity.addComponent(component)
+        restored[id] = entity
+    for fixup in reader.fixups:
+        fixup(restored)
+
+    world.idCounter = idCounter
+    world.generations = generations
+    world.freeIds = freeIds
+    world.queries.clear()
+    world.queryResults.clear()
+    for entity in restored.itervalues():
+        world.addEntity(entity)
+
+    groupManager = world.getManager('Group')
+    groupManager.clear()
+    for index in range(reader.uint()):
+        group = reader.value()
+        for memberIndex in range(reader.uint()):
+            groupManager.add(group, restored[reader.uint()])
+
+    events = []
+    for index in range(reader.uint()):
+        type, count = reader.unpack('<II')
+        attributes = {}
+        for attributeIndex in range(count):
+            key = reader.string()
+            attributes[key] = reader.value()
+        events.append(pygame.event.Event(type, attributes))
+    world.eventQueue[:] = events
+
+    world.tick = reader.uint()
+    elapsed = [reader.unpack('<d')[0] for index in range(reader.uint())]
+    for system, systemElapsed in zip(world.systems, elapsed):
+        system.elapsed = systemElapsed
+
+    # Anything the systems had queued belongs to the abandoned timeline
+    del world.commandBuffer.commands[:]
+    for system in world.systems:
+        del system.eventQueue[:]
+    return world
+
+def findComponent(entity, className):
+    for component in entity.components:
+        if component is not None and component.__class__.__name__ == className:
+            return component
+    return None
@@ -6,11 +6,14 @@ class AnimationSystem(System):
     def __init__(self):
         super(AnimationSystem, self).__init__()
         self.requirements = ('Drawable', 'Animation')
+        self.reads = ()
+        self.writes = ('Animation', 'Drawable')
 
     def process(self, entities, dt):
+        drawableId, animationId = self.getTypeIds()
         for entity in entities:
-            drawable = entity.getComponent("Drawable")
-            animation = entity.getComponent("Animation")
+            drawable = entity.getComponentById(drawableId)
+            animation = entity.getComponentById(animationId)
 
             # Advance the animation
             animation.accumulator += dt
@@ -8,12 +8,15 @@ class CameraSystem(System):
     def __init__(self):
         super(CameraSystem, self).__init__()
         self.requirements = ('Camera', 'Position')
+        self.reads = ('Drawable', 'Group')
+        self.writes = ('Position',)
 
     def process(self, entities, dt):
+        cameraId, positionId = self.getTypeIds()
         for entity in entities:
-            position = entity.getComponent("Position")
-            camera = entity.getComponent("Camera")
-            viewportSize = Vector2(camera.getViewport().get_size())
+            position = entity.getComponentById(positionId)
+            camera = entity.getComponentById(cameraId)
+            viewportSize = camera.viewportSize
 
             # Assume the camera will center on a player entity
 
@@ -26,6 +29,11 @@ class CameraSystem(System):
                 playerPosition = player.getComponent("Position").value
                 if not player.hasComponent('Drawable'):
                     continue
+                # Nothing to do until the player, its sprite or the viewport changes
+                if camera.changed <= self.lastRun and \
+                        len(self.getChangedEntities((player,), 'Position')) == 0 and \
+                        len(self.getChangedEntities((player,), 'Drawable')) == 0:
+                    continue
                 playerDrawable = player.getComponent("Drawable")
                 newCameraPosition = \
                         playerPosition - viewportSize / 2 \
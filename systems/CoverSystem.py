@@ -9,51 +9,93 @@ class CoverSystem(System):
     def __init__(self):
         super(CoverSystem, self).__init__();
         self.requirements = ('Cover', 'Interactable')
+        self.reads = ('Group',)
+        self.writes = ('Cover', 'Concealable', 'PlayerInput', 'SpriteState', 'Drawable', 'Visible', 'Collidable', 'Events')
 
     def process(self, entities, dt):
-        # process the queued events
-        for event in self.eventQueue:
-            for entity in entities:
-                cover = entity.getComponent('Cover')
-                spriteState = entity.getComponent('SpriteState')
-
-                if event.type == enums.INTERACT and entity.id == event.target:
-                    playerEntity = self.world.getEntity(event.entity)
-                    player = playerEntity.getComponent('PlayerInput')
-                    cover.occupant = event.entity
-
-                    # Assume 'other' is always a player entity
-                    player.enabled = False
-                    playerEntity.removeComponent('Drawable')
-                    playerEntity.removeComponent('Visible')
-                    playerEntity.removeComponent('Collidable')
-                    spriteState.current = 'occupied'
-
-                    groupManager = self.world.getManager('Group')
-                    if groupManager.check(entity, 'plant'):
-                        self.world.post(pygame.event.Event(enums.SOUNDEVENT, code='plant'))
-                    elif groupManager.check(entity, 'bin'):
-                        self.world.post(pygame.event.Event(enums.SOUNDEVENT, code='bin'))
-                elif event.type == enums.STOPINTERACT and cover.occupant == event.target:
-                    # Assume 'other' is always a player entity
-                    playerEntity = self.world.getEntity(event.target)
-                    player = playerEntity.getComponent('PlayerInput')
-                    player.enabled = True
-                    cover.occupant = None
-                    ghostIdleSprite = Asset.Manager.getInstance().getSprite('ghost.png')
-                    playerEntity.addComponent(component.Drawable(ghostIdleSprite, 1))
-                    playerEntity.addComponent(component.Collidable())
-                    playerEntity.addComponent(component.Visible())
-                    '''
-                    Enabling this line locks Ghost to reappear at the position of the cover.
-                    If the cover is poorly placed, this will cause collision issues.
-                    playerEntity.getComponent('Position').value.x = entity.getComponent('Position').value.x
-                    '''
-                    spriteState.current = 'empty'
+        # process the queued events, which arrive with their target entity
+        for event, target in self.eventQueue:
+            if event.type == enums.INTERACT:
+                if target.hasComponent('Cover') and target.hasComponent('Interactable'):
+                    self.enterCover(target, event)
+            elif event.type == enums.STOPINTERACT:
+                entity = self.findCover(target, entities)
+                if entity is not None:
+                    self.leaveCover(entity, event)
         del self.eventQueue[:]
 
+    def findCover(self, occupant, entities):
+        # Concealable occupants remember their cover, so we can go straight to it
+        if occupant.hasComponent('Concealable'):
+            coverId = occupant.getComponent('Concealable').cover
+            if coverId is None or coverId not in self.world.entities:
+                return None
+            entity = self.world.getEntity(coverId)
+            if entity.hasComponent('Cover'):
+                cover = entity.getComponent('Cover')
+                if cover.occupant is not None and cover.occupant.id == occupant.id:
+                    return entity
+            return None
+
+        for entity in entities:
+            cover = entity.getComponent('Cover')
+            if cover.occupant is not None and cover.occupant.id == occupant.id:
+                return entity
+        return None
+
+    def enterCover(self, entity, event):
+        cover = entity.getComponent('Cover')
+        spriteState = entity.getComponent('SpriteState')
+        playerEntity = self.world.getEntity(event.entity)
+        player = playerEntity.getComponent('PlayerInput')
+        cover.occupant = playerEntity.getHandle()
+        if playerEntity.hasComponent('Concealable'):
+            playerEntity.getComponent('Concealable').cover = entity.id
+
+        # Assume 'other' is always a player entity
+        player.enabled = False
+        commandBuffer = self.world.getCommandBuffer()
+        # The components go back to the pool, for leaveCover to take again
+        commandBuffer.releaseComponent(playerEntity, 'Drawable')
+        commandBuffer.releaseComponent(playerEntity, 'Visible')
+        commandBuffer.releaseComponent(playerEntity, 'Collidable')
+        spriteState.current = 'occupied'
+
+        groupManager = self.world.getManager('Group')
+        if groupManager.check(entity, 'plant'):
+            self.world.post(pygame.event.Event(enums.SOUNDEVENT, code='plant'))
+        elif groupManager.check(entity, 'bin'):
+            self.world.post(pygame.event.Event(enums.SOUNDEVENT, code='bin'))
+
+    def leaveCover(self, entity, event):
+        cover = entity.getComponent('Cover')
+        spriteState = entity.getComponent('SpriteState')
+        if not self.world.isAlive(cover.occupant):
+            # The occupant was destroyed while hiding
+            cover.occupant = None
+            spriteState.current = 'empty'
+            return
+        # Assume 'other' is always a player entity
+        playerEntity = self.world.getEntity(event.target)
+        player = playerEntity.getComponent('PlayerInput')
+        player.enabled = True
+        cover.occupant = None
+        if playerEntity.hasComponent('Concealable'):
+            playerEntity.getComponent('Concealable').cover = None
+        ghostIdleSprite = Asset.Manager.getInstance().getSprite('ghost.png')
+        commandBuffer = self.world.getCommandBuffer()
+        commandBuffer.addComponent(playerEntity, self.world.createComponent(component.Drawable, ghostIdleSprite, 1))
+        commandBuffer.addComponent(playerEntity, self.world.createComponent(component.Collidable))
+        commandBuffer.addComponent(playerEntity, self.world.createComponent(component.Visible))
+        '''
+        Enabling this line locks Ghost to reappear at the position of the cover.
+        If the cover is poorly placed, this will cause collision issues.
+        playerEntity.getComponent('Position').value.x = entity.getComponent('Position').value.x
+        '''
+        spriteState.current = 'empty'
+
     def onAttach(self, world):
         super(CoverSystem, self).onAttach(world)
-        def handle(event):
-            self.eventQueue.append(event)
-        world.on([enums.INTERACT, enums.STOPINTERACT], handle)
+        def handle(event, target):
+            self.eventQueue.append((event, target))
+        world.onTargeted([enums.INTERACT, enums.STOPINTERACT], handle)
@@ -1,20 +1,41 @@
 import pygame
 from ecs import System
+from component import getAction
 
 class InputSystem(System):
 
     def __init__(self):
         super(InputSystem, self).__init__();
         self.requirements = ('EventHandler',)
+        # Maps an event type, or an (event type, action) pair, to the
+        # EventHandlers which subscribed to it
+        self.index = {}
+        self.indexedEntities = None
 
     def process(self, entities, dt):
+        # Handlers attached since the last run mark their EventHandler changed
+        if entities is not self.indexedEntities or len(self.getChangedEntities(entities, 'EventHandler')) > 0:
+            self.buildIndex(entities)
+
         # process the queued events
         for event in self.eventQueue:
-            for entity in entities:
-                inputComponent = entity.getComponent('EventHandler')
-                inputComponent.handle(event)
+            for inputComponent in self.index.get(event.type, ()):
+                inputComponent.dispatch(event.type, event)
+            action = getAction(event)
+            if action is not None:
+                key = (event.type, action)
+                for inputComponent in self.index.get(key, ()):
+                    inputComponent.dispatch(key, event)
         del self.eventQueue[:]
 
+    def buildIndex(self, entities):
+        self.index = {}
+        for entity in entities:
+            inputComponent = entity.getComponent('EventHandler')
+            for key in inputComponent.getSubscriptions():
+                self.index.setdefault(key, []).append(inputComponent)
+        self.indexedEntities = entities
+
     def onAttach(self, world):
         super(InputSystem, self).onAttach(world)
         def handle(event):
@@ -9,15 +9,14 @@ class InteractionSystem(System):
         self.requirements = ('Interactable',)
 
     def process(self, entities, dt):
-        # process the queued events
-        for event in self.eventQueue:
-            for entity in entities:
-                if entity.id == event.target:
-                    entity.getComponent('Interactable').handle(event)
+        # process the queued events, which arrive with their target entity
+        for event, entity in self.eventQueue:
+            if entity.hasComponent('Interactable'):
+                entity.getComponent('Interactable').handle(event)
         del self.eventQueue[:]
 
     def onAttach(self, world):
         super(InteractionSystem, self).onAttach(world)
-        def handle(event):
-            self.eventQueue.append(event)
-        world.on([enums.INTERACT], handle)
+        def handle(event, target):
+            self.eventQueue.append((event, target))
+        world.onTargeted([enums.INTERACT], handle)
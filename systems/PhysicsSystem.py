@@ -2,19 +2,58 @@ from ecs import System
 import math
 import newvector
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Velocities are in pixels per step of the original 60Hz simulation, so other
+# step lengths scale them by getStepScale(dt)
+STEP = 1.0 / 60
+
+def getStepScale(dt):
+    return dt / STEP
+
 class PhysicsSystem(System):
 
     def __init__(self):
         super(PhysicsSystem, self).__init__();
         self.requirements = ('Position', 'Acceleration', 'Velocity')
+        self.reads = ('TargetVelocity',)
+        self.writes = ('Position', 'Velocity')
+        # The entities left for the per-entity path, kept until the query
+        # result or the store's bindings change
+        self.unstored = ()
+        self.unstoredFrom = None
+        self.unstoredRevision = None
 
     def process(self, entities, dt):
         friction = 0
         # dt = (1.0 / 60.0)
+
+        # Bodies held in a VectorStore are integrated all at once
+        store = self.world.managers.get('Vector') if self.world is not None else None
+        if store is not None:
+            position, velocity, acceleration = store.getArrays(('Position', 'Velocity', 'Acceleration'))
+            lastPosition = position.copy()
+            lastVelocity = velocity.copy()
+            position += dt * (velocity + dt * acceleration / 2)
+            velocity += dt * acceleration
+            velocity[numpy.absolute(velocity) < 0.001] = 0
+            position += velocity * getStepScale(dt)
+            store.markChanged('Position', (position != lastPosition).any(axis=1))
+            store.markChanged('Velocity', (velocity != lastVelocity).any(axis=1))
+            if entities is not self.unstoredFrom or store.revision != self.unstoredRevision:
+                self.unstored = [entity for entity in entities if not store.contains(entity)]
+                self.unstoredFrom = entities
+                self.unstoredRevision = store.revision
+            entities = self.unstored
+
+        positionId, accelerationId, velocityId = self.getTypeIds()
         for entity in entities:
-            positionComponent = entity.getComponent('Position')
-            velocityComponent = entity.getComponent('Velocity')
-            accelerationComponent = entity.getComponent('Acceleration')
+            positionComponent = entity.getComponentById(positionId)
+            velocityComponent = entity.getComponentById(velocityId)
+            accelerationComponent = entity.getComponentById(accelerationId)
 
             # TargetVelocity is read-only so we don't need its component.
 
@@ -40,4 +79,4 @@ class PhysicsSystem(System):
 
             # Update components with new values
             velocityComponent.value = newvector.Vector2((x, y))
-            positionComponent.value = currentPosition + velocityComponent.value
+            positionComponent.value = currentPosition + velocityComponent.value * getStepScale(dt)
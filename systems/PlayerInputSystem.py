@@ -9,11 +9,14 @@ class PlayerInputSystem(System):
     def __init__(self):
         super(PlayerInputSystem, self).__init__()
         self.requirements = ('PlayerInput', 'Velocity')
+        self.reads = ('Collidable', 'Interactable')
+        self.writes = ('Velocity', 'SpriteState', 'Events')
 
     def process(self, entities, dt):
+        playerInputId, velocityId = self.getTypeIds()
         for entity in entities:
-            velocityComponent = entity.getComponent("Velocity")
-            player = entity.getComponent("PlayerInput")
+            velocityComponent = entity.getComponentById(velocityId)
+            player = entity.getComponentById(playerInputId)
             playerSpriteState = entity.getComponent('SpriteState')
             targetVelocity = Vector2(velocityComponent.value)
             for event in self.eventQueue:
@@ -0,0 +1,25 @@
+from ecs import System
+from newvector import Vector2
+
+class PositionHistorySystem(System):
+    '''
+    Remembers where every entity was at the start of the simulation step, so
+    the renderer can draw between the last two steps. Register it first.
+    '''
+
+    def __init__(self):
+        super(PositionHistorySystem, self).__init__()
+        self.requirements = ('Position',)
+        self.reads = ()
+        self.writes = ('Position',)
+
+    def process(self, entities, dt):
+        positionId, = self.getTypeIds()
+        for entity in entities:
+            position = entity.getComponentById(positionId)
+            value = position.value
+            if position.previous is None:
+                position.previous = Vector2(value.x, value.y)
+            else:
+                position.previous.x = value.x
+                position.previous.y = value.y
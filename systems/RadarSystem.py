@@ -1,19 +1,23 @@
 import pygame
-from ecs import System
+from ecs import System, getTypeId
 
 class RadarSystem(System):
 	def __init__(self):
 		super(RadarSystem, self).__init__();
 		self.requirements = ('Radar',)
+		self.reads = ('Position', 'Visible', 'Group')
+		self.writes = ('Radar',)
 
 	def process(self, entities, dt):
 		groupManager = self.world.getManager('Group')
 		collisionSystem = self.world.getSystem('TileCollisionSystem')
+		radarId, = self.getTypeIds()
+		positionId = getTypeId('Position')
 		for entity in entities:
-			radar = entity.getComponent("Radar")
+			radar = entity.getComponentById(radarId)
 			radar.targets.clear()
 			targetGroups = groupManager.getAll(radar.getTargetGroups())
-			entityPosition = entity.getComponent('Position').value
+			entityPosition = entity.getComponentById(positionId).value
 			# TODO: Use the Radar config to decide if we need to fire an event
 			for key, group in targetGroups.iteritems():
 				radar.targets[key] = set()
@@ -21,7 +25,7 @@ class RadarSystem(System):
 					ping = self.RadarPing()
 					ping.group = key
 					ping.entity = target
-					targetPosition = target.getComponent('Position').value
+					targetPosition = target.getComponentById(positionId).value
 					ping.position = targetPosition
 					ping.distance = targetPosition - entityPosition
 					ping.visible = target.hasComponent('Visible') and \
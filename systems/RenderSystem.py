@@ -1,9 +1,12 @@
 from ecs import System
 import pygame
-from newvector import Vector2
+from itertools import islice
 import component
+from util import DrawList, SpatialGrid, BackgroundCache
 
 DEBUG = False
+# Entities which moved further than this in a step are drawn where they landed
+SNAP_DISTANCE = 8
 colors = [ \
     (255, 255, 255, 255), \
     (255, 0, 255, 255), \
@@ -13,72 +16,194 @@ colors = [ \
 
 class RenderSystem(System):
 
-    def __init__(self, surface):
+    def __init__(self, surface, dirtyRects=False):
         super(RenderSystem, self).__init__();
         self.requirements = ('Position', 'Drawable')
         self.surface = surface
+        # In dirty rect mode only the parts of the surface which changed are
+        # redrawn. dirtyRects then holds the surface rects redrawn by the last
+        # frame, or None when the whole surface was.
+        self.dirtyRectMode = dirtyRects
+        self.dirtyRects = None
+        self.lastFrame = None
+        self.lastDraws = None
+        self.cameraEntities = None
+        # How far between the last two simulation steps to draw, see getPosition
+        self.alpha = 1.0
+        self.cameraLayers = []
+        self.sortedCameras = []
 
     def process(self, entities, dt):
-        self.surface.fill((0, 0, 0))
+        self.dirtyRects = None
         # Get the camera or use the default
         if self.world is not None:
             cameraEntities = self.world.getEntitiesWithComponents(['Camera'])
             if len(cameraEntities) == 0:
                 cameraEntities = [createCamera(self.world, self.surface.get_size())]
         else:
+            self.surface.fill((0, 0, 0))
             return
 
-        cameras = []
-        for cameraEntity in cameraEntities:
-            camera = cameraEntity.getComponent('Camera')
-            cameraPosition = cameraEntity.getComponent('Position').value
-            cameras.append(camera)
-
-            images = []
-            for entity in entities:
-                if not isOnCamera(cameraEntity, entity):
-                    continue
-
-                drawable = entity.getComponent('Drawable')
-                position = entity.getComponent('Position').value + drawable.offset
-
-                image = pygame.transform.flip(drawable.sprite.current(), drawable.flipped, False)
-                images.append((image, position, drawable.layer))
+        drawList = self.getDrawList()
+        grid = self.getSpatialGrid()
+        grid.update()
+        sortedCameras = self.getSortedCameras(cameraEntities)
+        if self.dirtyRectMode and not DEBUG and self.drawDirty(cameraEntities, grid, sortedCameras):
+            return
 
-                # if DEBUG, draw hitboxes
-                if DEBUG and entity.hasComponent('Dimension'):
-                    dimension = entity.getComponent('Dimension').value
-                    debugImage = pygame.Surface(dimension)
-                    debugImage.fill(colors[entity.id % 4])
-                    images.append((debugImage, position - drawable.offset, drawable.layer + 2))
+        # The static world at the back is pre-rendered, and costs a blit per chunk
+        background = self.getBackground(drawList)
+        drawableId = self.getTypeIds()[1]
 
+        self.surface.fill((0, 0, 0))
+        for cameraEntity in cameraEntities:
+            camera = cameraEntity.getComponent('Camera')
+            cameraPosition = self.getPosition(cameraEntity)
             viewport = camera.getViewport()
             viewport.fill((0, 0, 0))
-            sortedImages = sorted(images, key=lambda image: image[2])
-            for image, position, layer in sortedImages:
-                viewport.blit(image, position - cameraPosition)
+            visible = self.getVisible(cameraEntity, grid)
+            # Baked chunks go first, then visible entities back to front, and
+            # everything is submitted to the viewport in one go. The baked
+            # entities come first in draw order, so they lead the visible list.
+            blits = []
+            start = 0
+            if background is not None:
+                blits = background.getBlits(cameraPosition, viewport.get_size())
+                while start < len(visible) and visible[start].id in background.ids:
+                    start += 1
+            for entity in islice(visible, start, None):
+                drawable = entity.getComponentById(drawableId)
+                position = self.getPosition(entity) + drawable.offset
+                blits.append((drawable.sprite.currentFlipped(drawable.flipped), position - cameraPosition))
+            viewport.blits(blits, False)
+
+            # if DEBUG, draw hitboxes over everything else
+            if DEBUG:
+                for entity in visible:
+                    if entity.hasComponent('Dimension'):
+                        position = self.getPosition(entity) - cameraPosition
+                        dimension = entity.getComponent('Dimension').value
+                        viewport.fill(colors[entity.id % 4], pygame.Rect(position, dimension))
 
         # Render individual viewports to the screen surface display
-        sortedCameras = sorted(cameras, key=lambda camera: camera.layer)
         for camera in sortedCameras:
             cameraView = camera.getViewport()
             cameraPosition = camera.viewportPosition
             self.surface.blit(cameraView, cameraPosition)
 
-def isOnCamera(camera, entity):
-    position = entity.getComponent('Position').value
-    dimension = getDrawableEntityDimension(entity)
-
-    cameraPosition = camera.getComponent('Position').value
-    cameraDimension = Vector2(camera.getComponent('Camera').getViewport().get_size())
+    def getPosition(self, entity):
+        # Blends the positions of the last two simulation steps, so motion stays
+        # smooth when frames fall between steps. Big jumps are teleports.
+        position = entity.getComponent('Position')
+        previous = position.previous
+        if self.alpha >= 1 or previous is None:
+            return position.value
+        value = position.value
+        if abs(value.x - previous.x) > SNAP_DISTANCE or abs(value.y - previous.y) > SNAP_DISTANCE:
+            return value
+        return previous + (value - previous) * self.alpha
+
+    def getDrawList(self):
+        # The system is shared between worlds, so each world keeps its own list
+        drawList = self.world.managers.get('Draw')
+        if drawList is None:
+            drawList = self.world.addManager('Draw', DrawList(self.world))
+        return drawList
+
+    def getSpatialGrid(self):
+        grid = self.world.managers.get('Grid')
+        if grid is None:
+            grid = self.world.addManager('Grid', SpatialGrid(self.world))
+        return grid
+
+    def getVisible(self, cameraEntity, grid):
+        # The entities a camera can see, back to front as in the draw list
+        position = cameraEntity.getComponent('Position').value
+        width, height = cameraEntity.getComponent('Camera').getViewport().get_size()
+        return grid.query((int(position.x), int(position.y), width, height))
+
+    def getBackground(self, drawList):
+        # The Static drawables at the back of the draw list, baked in chunks
+        # and kept on the list. Returns None if there's nothing worth baking.
+        if drawList.baked is None:
+            drawList.baked = BackgroundCache(drawList)
+        background = drawList.baked
+        background.update()
+        return background if len(background) >= 2 else None
+
+    def getSortedCameras(self, cameraEntities):
+        # Cameras are only re-sorted when they, or their layers, change
+        if cameraEntities is not self.cameraEntities or \
+                any(camera.layer != layer for camera, layer in self.cameraLayers):
+            cameras = [cameraEntity.getComponent('Camera') for cameraEntity in cameraEntities]
+            self.sortedCameras = sorted(cameras, key=lambda camera: camera.layer)
+            self.cameraLayers = [(camera, camera.layer) for camera in cameras]
+            self.cameraEntities = cameraEntities
+        return self.sortedCameras
+
+    def getDraws(self, cameraEntity, grid):
+        # What a camera shows, as (image, viewport rect, layer) back to front
+        cameraPosition = self.getPosition(cameraEntity)
+        draws = []
+        for entity in self.getVisible(cameraEntity, grid):
+            drawable = entity.getComponent('Drawable')
+            position = self.getPosition(entity) + drawable.offset
+            image = drawable.sprite.currentFlipped(drawable.flipped)
+            draws.append((image, pygame.Rect(position - cameraPosition, image.get_size()), drawable.layer))
+        return draws
+
+    def drawDirty(self, cameraEntities, grid, sortedCameras):
+        # Compares what each viewport shows with the last frame, and redraws
+        # just the regions which differ. Returns False if the whole frame must
+        # be drawn, because the world or a camera changed.
+        frame = (self.world, tuple((cameraEntity.id, camera.layer, tuple(camera.viewportPosition),
+            camera.getViewport().get_size(), tuple(self.getPosition(cameraEntity)))
+            for cameraEntity, camera in
+                ((cameraEntity, cameraEntity.getComponent('Camera')) for cameraEntity in cameraEntities)))
+        draws = [self.getDraws(cameraEntity, grid) for cameraEntity in cameraEntities]
+
+        lastDraws = self.lastDraws
+        self.lastDraws = draws
+        if frame != self.lastFrame:
+            self.lastFrame = frame
+            return False
+
+        surfaceRect = self.surface.get_rect()
+        self.dirtyRects = []
+        for cameraEntity, viewDraws, lastViewDraws in zip(cameraEntities, draws, lastDraws):
+            current = set(drawKey(draw) for draw in viewDraws)
+            previous = set(drawKey(draw) for draw in lastViewDraws)
+            changed = current.symmetric_difference(previous)
+            if len(changed) == 0:
+                continue
 
-    return (int(position.x) < int(cameraPosition.x) + cameraDimension.x) and \
-        (int(position.x) + dimension.x > int(cameraPosition.x)) and \
-        (int(position.y) < int(cameraPosition.y) + cameraDimension.y) and \
-        (int(position.y) + dimension.y > int(cameraPosition.y))
-
-def getDrawableEntityDimension(entity):
-    return Vector2(entity.getComponent('Drawable').sprite.current().get_size())
+            camera = cameraEntity.getComponent('Camera')
+            viewport = camera.getViewport()
+            viewportPosition = camera.viewportPosition
+            for key in changed:
+                rect = pygame.Rect(key[1:5]).clip(viewport.get_rect())
+                if rect.width == 0 or rect.height == 0:
+                    continue
+                viewport.set_clip(rect)
+                viewport.fill((0, 0, 0))
+                for image, drawRect, layer in viewDraws:
+                    if drawRect.colliderect(rect):
+                        viewport.blit(image, drawRect)
+                viewport.set_clip(None)
+                self.dirtyRects.append(rect.move(viewportPosition).clip(surfaceRect))
+
+        # Composite the redrawn regions of every viewport back onto the surface
+        for rect in self.dirtyRects:
+            self.surface.fill((0, 0, 0), rect)
+            for camera in sortedCameras:
+                viewportPosition = camera.viewportPosition
+                area = rect.move(-viewportPosition[0], -viewportPosition[1]).clip(camera.getViewport().get_rect())
+                self.surface.blit(camera.getViewport(), (viewportPosition[0] + area.x, viewportPosition[1] + area.y), area)
+        return True
+
+def drawKey(draw):
+    image, rect, layer = draw
+    return (image, rect.x, rect.y, rect.width, rect.height, layer)
 
 def createCamera(world, size):
     camera = world.createEntity()
@@ -7,6 +7,10 @@ class SoundSystem(System):
     def __init__(self, world, SOUND):
         super(SoundSystem, self).__init__();
         self.requirements = ('EventHandler',)
+        self.reads = ()
+        self.writes = ('Sound',)
+        # Sounds are only ever played in response to events
+        self.eventDriven = True
         self.SOUND = SOUND
         if self.SOUND == True:
             assetManager = Asset.Manager.getInstance()
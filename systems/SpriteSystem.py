@@ -7,11 +7,15 @@ class SpriteSystem(System):
     def __init__(self):
         super(SpriteSystem, self).__init__()
         self.requirements = ('Drawable', 'SpriteState')
+        self.reads = ()
+        self.writes = ('Drawable', 'SpriteState')
 
     def process(self, entities, dt):
-        for entity in entities:
-            currentSprite = entity.getComponent("Drawable")
-            possibleStates = entity.getComponent("SpriteState")
+        # Only entities whose SpriteState changed can need a new sprite
+        drawableId, spriteStateId = self.getTypeIds()
+        for entity in self.getChangedEntities(entities, 'SpriteState'):
+            currentSprite = entity.getComponentById(drawableId)
+            possibleStates = entity.getComponentById(spriteStateId)
             currentState = possibleStates.current
             lastState = possibleStates.last
             if currentState is not None and currentState is not lastState:
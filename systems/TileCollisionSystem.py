@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 from newvector import Vector2
 import pygame
-from ecs import System
+from ecs import System, getTypeId
 import math
 from util import enums
+from PhysicsSystem import getStepScale
 
 
 class TileCollisionSystem(System):
@@ -11,6 +12,8 @@ class TileCollisionSystem(System):
     def __init__(self, tileMap):
         super(TileCollisionSystem, self).__init__();
         self.requirements = ('Collidable', 'Position')
+        self.reads = ('Dimension', 'LastPosition', 'Velocity')
+        self.writes = ('Position', 'Velocity', 'Collidable', 'Events')
         self.tileMap = tileMap
         self.tileEntityMap = {}
         self.entityCollisionSet = {}
@@ -82,19 +85,20 @@ class TileCollisionSystem(System):
         self.tileEntityMap = {}
 
         # Process entities
+        collidableId, positionId = self.getTypeIds()
+        dimensionId = getTypeId('Dimension')
         for entity in entities:
             # Initalise the entityCollisionSet
             self.entityCollisionSet[entity.id] = set()
 
             # Retrieve relevant components
-            positionComponent = entity.getComponent('Position')
+            positionComponent = entity.getComponentById(positionId)
             position = positionComponent.value
-            collidable = entity.getComponent('Collidable')
+            collidable = entity.getComponentById(collidableId)
             collidable.collisionSet.clear()
             # Does entity have a size?
-            dimension = entity.getComponent('Dimension').value \
-                    if entity.hasComponent('Dimension') \
-                    else Vector2(1, 1)
+            dimensionComponent = entity.getComponentById(dimensionId)
+            dimension = dimensionComponent.value if dimensionComponent is not None else Vector2(1, 1)
 
             # Calculate the number of tiles entity overlaps
             maxPosition = position + dimension
@@ -128,7 +132,8 @@ class TileCollisionSystem(System):
                 positionComponent = entity.getComponent('Position')
                 position = positionComponent.value
                 velocityComponent = entity.getComponent('Velocity')
-                position -= velocityComponent.value
+                position -= velocityComponent.value * getStepScale(dt)
+                positionComponent.markChanged()
                 velocityComponent.value = Vector2()
             elif entity.hasComponent('LastPosition'):
                 positionComponent.value = Vector2(entity.getComponent('LastPosition').value)
@@ -8,16 +8,22 @@ class VelocityFacingSystem(System):
     def __init__(self):
         super(VelocityFacingSystem, self).__init__()
         self.requirements = ('Drawable', 'Velocity', 'Facing')
+        self.reads = ()
+        self.writes = ('Facing', 'Drawable')
 
     def process(self, entities, dt):
+        drawableId, velocityId, facingId = self.getTypeIds()
         for entity in entities:
-            drawable = entity.getComponent("Drawable")
-            velocity = entity.getComponent("Velocity").value
-            facing = entity.getComponent("Facing")
+            drawable = entity.getComponentById(drawableId)
+            velocity = entity.getComponentById(velocityId).value
+            facing = entity.getComponentById(facingId)
             if velocity.x != 0:
                 if velocity.x < 0:
                     facing.direction = Facing.LEFT
                 else:
                     facing.direction = Facing.RIGHT
 
-            drawable.flip(facing.direction is Facing.LEFT)
+            # Drawables keep their flip, so only new drawables or turns need one
+            since = self.lastRun
+            if facing.changed > since or drawable.changed > since or entity.changed > since:
+                drawable.flip(facing.direction is Facing.LEFT)
@@ -12,3 +12,4 @@ from CameraSystem import *
 from VelocityFacingSystem import *
 from PlayerInputSystem import *
 from CoverSystem import *
+from PositionHistorySystem import *
@@ -1,5 +1,6 @@
-from pygame import Surface, Rect, locals, image, mixer, font
+from pygame import Surface, Rect, locals, image, mixer, font, transform
 from .resourcepath import resource_path
+from .Atlas import Atlas
 from os import path
 
 font.init()
@@ -76,19 +77,43 @@ class Manager(object):
 
 
 class SpriteData(object):
-    def __init__(self, surface, totalFrames=1, frameDimensions=(1,1), spriteDimensions=None):
+    # Every sprite's frames, and their transformed copies, are packed together
+    atlas = Atlas()
+
+    def __init__(self, surface, totalFrames=1, frameDimensions=(1,1), spriteDimensions=None, pack=True):
         if isinstance(surface, Surface):
-            self.frames = SpriteData.getFramesFromSpriteSheet(surface, totalFrames, frameDimensions, spriteDimensions)
+            frames = SpriteData.getFramesFromSpriteSheet(surface, totalFrames, frameDimensions, spriteDimensions)
             self.totalFrames = totalFrames
         else:
-            self.frames = surface
-            self.totalFrames = len(self.frames)
+            frames = surface
+            self.totalFrames = len(frames)
+        # Short-lived frames (e.g. composed text) are left out of the atlas,
+        # as its pages are never freed
+        self.packed = pack
+        self.frames = [SpriteData.atlas.pack(frame) for frame in frames] if pack else list(frames)
         self.lastFrame = self.totalFrames - 1
+        # Transformed copies of frames, built the first time they are asked for
+        self.transformed = {}
 
 
     def getKeyframe(self, frame):
         return self.frames[frame]
 
+    def getTransformedKeyframe(self, frame, transformFunc, *args):
+        key = (frame, transformFunc, args)
+        surface = self.transformed.get(key)
+        if surface is None:
+            surface = transformFunc(self.frames[frame], *args)
+            if self.packed:
+                surface = SpriteData.atlas.pack(surface)
+            self.transformed[key] = surface
+        return surface
+
+    def getFlippedKeyframe(self, frame, flipX, flipY=False):
+        if not flipX and not flipY:
+            return self.frames[frame]
+        return self.getTransformedKeyframe(frame, transform.flip, flipX, flipY)
+
     @staticmethod
     def getFramesFromSpriteSheet(spritesheet, totalFrames, frameDimensions, spriteDimensions):
         if spriteDimensions is None:
@@ -123,6 +148,9 @@ class Sprite(object):
     def current(self):
         return self.spriteData.getKeyframe(self.currentFrame)
 
+    def currentFlipped(self, flipX, flipY=False):
+        return self.spriteData.getFlippedKeyframe(self.currentFrame, flipX, flipY)
+
     def next(self):
         self.currentFrame += 1
         if self.loop:
@@ -0,0 +1,48 @@
+from pygame import Surface, Rect, BLEND_RGBA_MAX
+
+class Atlas(object):
+    '''
+    Packs small sprite frames onto a few large pages, filling each page in rows
+    ("shelves"). Packed frames are returned as subsurfaces of their page, so they
+    can be used anywhere a frame could, while sharing memory with their
+    neighbours. Frames which are too big, or not in the pages' pixel format,
+    are returned as they are.
+    '''
+    def __init__(self, pageSize=(256, 256), maxFrameSize=(64, 64)):
+        self.pageSize = pageSize
+        self.maxFrameSize = maxFrameSize
+        self.pages = []
+        self.x = 0
+        self.y = 0
+        self.shelfHeight = 0
+
+    def pack(self, surface):
+        width, height = surface.get_size()
+        if width == 0 or height == 0 or width > self.maxFrameSize[0] or height > self.maxFrameSize[1]:
+            return surface
+        if len(self.pages) > 0 and not self.canHold(surface):
+            return surface
+
+        if self.x + width > self.pageSize[0]:
+            self.x = 0
+            self.y += self.shelfHeight
+            self.shelfHeight = 0
+        if len(self.pages) == 0 or self.y + height > self.pageSize[1]:
+            self.pages.append(Surface(self.pageSize, surface.get_flags(), surface))
+            self.x = 0
+            self.y = 0
+            self.shelfHeight = 0
+
+        rect = Rect(self.x, self.y, width, height)
+        page = self.pages[-1]
+        # New pages are zeroed, so this copies the pixels exactly, alpha included
+        page.blit(surface, rect, None, BLEND_RGBA_MAX)
+        self.x += width
+        self.shelfHeight = max(self.shelfHeight, height)
+        return page.subsurface(rect)
+
+    def canHold(self, surface):
+        page = self.pages[0]
+        return surface.get_bitsize() == page.get_bitsize() and \
+            surface.get_masks() == page.get_masks() and \
+            surface.get_flags() & page.get_flags() == page.get_flags()
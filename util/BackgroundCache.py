@@ -0,0 +1,114 @@
+from pygame import Surface, Rect, locals
+from ecs import getTypeId, currentVersion
+
+class BackgroundCache(object):
+    '''
+    Pre-renders the Static drawables at the back of a DrawList (see
+    DrawList.getStaticPrefix) onto square chunks in world space, so the static
+    world costs a blit for each chunk a camera overlaps. Chunks are keyed by
+    the layer range they cover and baked the first time a camera sees them.
+    A chunk is dropped when a member overlapping it changes, found through the
+    members' change stamps, and rebaked when it is next seen.
+    '''
+    def __init__(self, drawList, chunkSize=128):
+        self.drawList = drawList
+        self.chunkSize = chunkSize
+        self.positionId = getTypeId('Position')
+        self.drawableId = getTypeId('Drawable')
+        self.revision = None
+        self.entities = []
+        self.ids = set()
+        # [entity, position, drawable, rect] for each entity, in draw order
+        self.members = []
+        self.layerRange = None
+        self.bounds = None
+        self.version = currentVersion()
+        self.chunks = {}
+
+    def __len__(self):
+        return len(self.members)
+
+    def update(self):
+        # Starts again if the run of Static entities changed, or else drops the
+        # chunks under any member which changed since the last update
+        if self.revision != self.drawList.revision:
+            self.revision = self.drawList.revision
+            entities = self.drawList.getStaticPrefix()
+            if entities != self.entities:
+                self.reset(entities)
+                return
+
+        version = self.version
+        for member in self.members:
+            entity, position, drawable, rect = member
+            if entity.changed > version or position.changed > version or drawable.changed > version:
+                member[1] = position = entity.getComponentById(self.positionId)
+                member[2] = drawable = entity.getComponentById(self.drawableId)
+                member[3] = getRect(position, drawable)
+                self.dropChunks(rect)
+                self.dropChunks(member[3])
+                self.bounds = getBounds(self.members)
+        self.version = currentVersion()
+
+    def reset(self, entities):
+        self.entities = list(entities)
+        self.ids = set(entity.id for entity in self.entities)
+        self.members = []
+        for entity in self.entities:
+            position = entity.getComponentById(self.positionId)
+            drawable = entity.getComponentById(self.drawableId)
+            self.members.append([entity, position, drawable, getRect(position, drawable)])
+        self.bounds = getBounds(self.members)
+        if len(self.members) > 0:
+            self.layerRange = (self.members[0][2].layer, self.members[-1][2].layer)
+        self.chunks = {}
+        self.version = currentVersion()
+
+    def getBlits(self, cameraPosition, viewportSize):
+        # (surface, viewport position) for each chunk a viewport overlaps. All
+        # chunks move by the same whole number of pixels, as one surface would.
+        if self.bounds is None:
+            return []
+        shiftX = int(self.bounds.x - cameraPosition.x) - self.bounds.x
+        shiftY = int(self.bounds.y - cameraPosition.y) - self.bounds.y
+        visible = Rect(-shiftX, -shiftY, viewportSize[0], viewportSize[1]).clip(self.bounds)
+        if visible.width == 0 or visible.height == 0:
+            return []
+
+        size = self.chunkSize
+        blits = []
+        for y in xrange(visible.top // size, (visible.bottom - 1) // size + 1):
+            for x in xrange(visible.left // size, (visible.right - 1) // size + 1):
+                blits.append((self.getChunk(x, y), (x * size + shiftX, y * size + shiftY)))
+        return blits
+
+    def getChunk(self, x, y):
+        key = (self.layerRange, x, y)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = self.bake(Rect(x * self.chunkSize, y * self.chunkSize, self.chunkSize, self.chunkSize))
+        return chunk
+
+    def bake(self, area):
+        # Draws the members onto black, as they would be drawn onto a viewport
+        surface = Surface(area.size, locals.SRCALPHA)
+        surface.fill((0, 0, 0))
+        for entity, position, drawable, rect in self.members:
+            if rect.colliderect(area):
+                surface.blit(drawable.sprite.currentFlipped(drawable.flipped), rect.move(-area.x, -area.y))
+        return surface
+
+    def dropChunks(self, rect):
+        size = self.chunkSize
+        for y in xrange(rect.top // size, (rect.bottom - 1) // size + 1):
+            for x in xrange(rect.left // size, (rect.right - 1) // size + 1):
+                self.chunks.pop((self.layerRange, x, y), None)
+
+def getRect(position, drawable):
+    image = drawable.sprite.currentFlipped(drawable.flipped)
+    return Rect(position.value + drawable.offset, image.get_size())
+
+def getBounds(members):
+    if len(members) == 0:
+        return None
+    return members[0][3].unionall([member[3] for member in members[1:]])
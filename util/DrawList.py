@@ -0,0 +1,81 @@
+from bisect import bisect_left, insort
+from ecs import getMask
+
+class DrawList(object):
+    '''
+    Keeps the entities which can be drawn (those with a Position and a Drawable)
+    in buckets by Drawable.layer, each bucket in id order, so renderers can walk
+    them back to front without sorting. Entities are only re-bucketed when they
+    gain or lose a Drawable, or its layer is changed.
+    '''
+    def __init__(self, world):
+        self.world = world
+        self.mask = getMask(('Position', 'Drawable'))
+        self.layers = []
+        self.buckets = {}
+        self.bucketIds = {}
+        self.entityLayers = {}
+        # Bumped on every change, so derived data knows to rebuild
+        self.revision = 0
+        self.staticPrefix = []
+        self.prefixRevision = None
+        # Static drawables baked by a renderer, see RenderSystem.getBackground
+        self.baked = None
+
+    def __iter__(self):
+        for layer in self.layers:
+            for entity in self.buckets[layer]:
+                yield entity
+
+    def __len__(self):
+        return len(self.entityLayers)
+
+    def getStaticPrefix(self):
+        # The Static entities drawn before any other, which can be pre-rendered
+        if self.prefixRevision != self.revision:
+            self.staticPrefix = []
+            for entity in self:
+                if not entity.hasComponent('Static'):
+                    break
+                self.staticPrefix.append(entity)
+            self.prefixRevision = self.revision
+        return self.staticPrefix
+
+    def onEntityChanged(self, entity):
+        if not entity.hasComponents(self.mask):
+            self.onEntityRemoved(entity)
+            return
+
+        self.revision += 1
+        layer = entity.getComponent('Drawable').layer
+        if entity.id in self.entityLayers:
+            if self.entityLayers[entity.id] == layer:
+                # The id may now belong to a different entity object
+                ids = self.bucketIds[layer]
+                self.buckets[layer][bisect_left(ids, entity.id)] = entity
+                return
+            self.onEntityRemoved(entity)
+
+        if layer not in self.buckets:
+            insort(self.layers, layer)
+            self.buckets[layer] = []
+            self.bucketIds[layer] = []
+        ids = self.bucketIds[layer]
+        index = bisect_left(ids, entity.id)
+        ids.insert(index, entity.id)
+        self.buckets[layer].insert(index, entity)
+        self.entityLayers[entity.id] = layer
+
+    def onEntityRemoved(self, entity):
+        if entity.id not in self.entityLayers:
+            return
+        layer = self.entityLayers.pop(entity.id)
+        self.revision += 1
+        ids = self.bucketIds[layer]
+        index = bisect_left(ids, entity.id)
+        del ids[index]
+        del self.buckets[layer][index]
+        if len(ids) == 0:
+            self.layers.remove(layer)
+            del self.buckets[layer]
+            del self.bucketIds[layer]
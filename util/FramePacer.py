@@ -0,0 +1,73 @@
+import os, time
+from timeit import default_timer
+
+class FramePacer(object):
+    '''
+    Holds the main loop to a frame cap, so it idles instead of spinning. Each
+    frame sleeps until shortly before its deadline, then spins for the rest, as
+    sleeps are only accurate to a millisecond or two. When the display is
+    synchronised to vblank, flipping already waits, so the pacer only sleeps if
+    the flips turn out not to block. A cap of 0 means frames are not held back.
+    Frames which miss their deadline by a whole frame or more are counted as
+    dropped.
+    '''
+    def __init__(self, frameCap=60, vsync=False, spinTime=0.002):
+        self.period = 1.0 / frameCap if frameCap > 0 else 0
+        self.vsync = vsync
+        self.spinTime = spinTime
+        self.deadline = None
+        self.lastFrame = None
+        self.start = default_timer()
+        self.startCPU = getCPUTime()
+        self.frames = 0
+        self.dropped = 0
+        self.sleepTime = 0
+        # Also given to the profiler as 'Sleep' samples if there is one
+        self.profiler = None
+
+    def endFrame(self):
+        now = default_timer()
+        self.frames += 1
+        if self.period == 0:
+            return
+
+        if self.deadline is None:
+            self.deadline = now + self.period
+        elif now > self.deadline + self.period:
+            # Too late to catch up, so start again from now
+            self.dropped += int((now - self.deadline) / self.period)
+            self.deadline = now + self.period
+        else:
+            synced = self.vsync and self.lastFrame is not None and \
+                now - self.lastFrame >= self.period * 0.9
+            if not synced:
+                self.waitUntil(self.deadline)
+            self.deadline += self.period
+        self.lastFrame = default_timer()
+
+    def waitUntil(self, deadline):
+        start = default_timer()
+        remaining = deadline - start
+        if remaining > self.spinTime:
+            time.sleep(remaining - self.spinTime)
+        while default_timer() < deadline:
+            pass
+        elapsed = default_timer() - start
+        self.sleepTime += elapsed
+        if self.profiler is not None:
+            self.profiler.record(None, 'Sleep', elapsed)
+
+    def summary(self):
+        elapsed = default_timer() - self.start
+        return {
+            'frames': self.frames,
+            'fps': self.frames / elapsed if elapsed > 0 else 0,
+            'dropped': self.dropped,
+            'idlePercent': 100 * self.sleepTime / elapsed if elapsed > 0 else 0,
+            'cpuPercent': 100 * (getCPUTime() - self.startCPU) / elapsed if elapsed > 0 else 0
+        }
+
+def getCPUTime():
+    # User and system time used by this process
+    times = os.times()
+    return times[0] + times[1]
@@ -0,0 +1,108 @@
+import pygame
+from timeit import default_timer
+
+FILTERS = ('nearest', 'scale2x', 'smooth')
+
+class Presenter(object):
+    '''
+    Scales the low resolution screen up to the window and shows it. Scaling
+    goes straight into the display surface when their formats match, or else
+    into a target surface kept between frames, so presenting allocates nothing.
+    'nearest' is an exact pixel repeat for whole multiples of the screen size,
+    'scale2x' applies Scale2x as many times as the scale allows before finishing
+    with nearest, and 'smooth' uses smoothscale.
+    '''
+    def __init__(self, display, screen, filter='nearest'):
+        self.display = display
+        self.screen = screen
+        self.filter = filter if filter in FILTERS else 'nearest'
+        self.outputSize = display.get_size()
+        width, height = screen.get_size()
+        self.integerScale = self.outputSize[0] % width == 0 and self.outputSize[1] % height == 0
+        self.scale = (self.outputSize[0] / width, self.outputSize[1] / height)
+        self.direct = canScaleInto(screen, display)
+        self.target = display if self.direct else pygame.Surface(self.outputSize, screen.get_flags(), screen)
+        if self.filter == 'smooth' and self.target.get_bitsize() < 24:
+            # smoothscale only works on 24 and 32 bit surfaces
+            self.filter = 'nearest'
+        self.passes = self.getScale2xPasses() if self.filter == 'scale2x' else []
+        # Timings, also given to the profiler as 'Present' samples if there is one
+        self.profiler = None
+        self.frames = 0
+        self.totalTime = 0
+        self.worstTime = 0
+
+    def getScale2xPasses(self):
+        # Intermediate surfaces for each doubling, which must be exact
+        factor = self.scale[0]
+        if not self.integerScale or factor != self.scale[1]:
+            return []
+        passes = []
+        size = self.screen.get_size()
+        while factor % 2 == 0:
+            factor /= 2
+            size = (size[0] * 2, size[1] * 2)
+            if factor == 1:
+                passes.append(self.target)
+            else:
+                passes.append(pygame.Surface(size, self.screen.get_flags(), self.screen))
+        return passes
+
+    def canPresentRects(self):
+        # Only nearest neighbour scales a part of the screen as it would the whole
+        return self.integerScale and self.filter == 'nearest'
+
+    def present(self, rects=None):
+        # Shows the whole screen, or just the given screen rects
+        start = default_timer()
+        if rects is None or not self.canPresentRects():
+            self.scaleFull()
+            if not self.direct:
+                self.display.blit(self.target, (0, 0))
+            pygame.display.flip()
+        else:
+            updated = []
+            for rect in rects:
+                outputRect = pygame.Rect(rect.x * self.scale[0], rect.y * self.scale[1],
+                    rect.width * self.scale[0], rect.height * self.scale[1])
+                if self.direct:
+                    pygame.transform.scale(self.screen.subsurface(rect), outputRect.size, self.display.subsurface(outputRect))
+                else:
+                    self.display.blit(pygame.transform.scale(self.screen.subsurface(rect), outputRect.size), outputRect)
+                updated.append(outputRect)
+            pygame.display.update(updated)
+        self.record(default_timer() - start)
+
+    def scaleFull(self):
+        if self.filter == 'smooth':
+            pygame.transform.smoothscale(self.screen, self.outputSize, self.target)
+        elif len(self.passes) > 0:
+            source = self.screen
+            for surface in self.passes:
+                pygame.transform.scale2x(source, surface)
+                source = surface
+            if source is not self.target:
+                pygame.transform.scale(source, self.outputSize, self.target)
+        else:
+            pygame.transform.scale(self.screen, self.outputSize, self.target)
+
+    def record(self, elapsed):
+        self.frames += 1
+        self.totalTime += elapsed
+        self.worstTime = max(self.worstTime, elapsed)
+        if self.profiler is not None:
+            self.profiler.record(None, 'Present', elapsed)
+
+    def summary(self):
+        return {
+            'frames': self.frames,
+            'meanMs': self.totalTime * 1000 / self.frames if self.frames > 0 else 0,
+            'maxMs': self.worstTime * 1000
+        }
+
+def canScaleInto(source, destination):
+    # pygame scales pixels without converting them, so both surfaces need the
+    # same pixel size and colour layout (alpha is ignored on the display)
+    return source.get_bytesize() == destination.get_bytesize() and \
+        source.get_masks()[:3] == destination.get_masks()[:3] and \
+        source.get_shifts()[:3] == destination.get_shifts()[:3]
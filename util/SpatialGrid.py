@@ -0,0 +1,147 @@
+from bisect import bisect_left, insort
+from heapq import merge
+from ecs import getTypeId, getMask, currentVersion
+
+class SpatialGrid(object):
+    '''
+    Buckets the entities which can be drawn (those with a Position and a
+    Drawable) into square cells by their bounds, so a camera only looks at the
+    entities in the cells its viewport overlaps. Each cell keeps its entities
+    by Drawable.layer, each layer in id order, so hits come back in draw list
+    order without sorting. Bounds are the whole pixel position and the size of
+    the current sprite frame.
+
+    Entities are placed when they are added or change layer. After that,
+    update re-places only the non-Static entities whose change stamps moved
+    on, so writers of Position must mark it changed (see VectorStore.markChanged).
+    '''
+    def __init__(self, world, cellSize=64):
+        self.world = world
+        self.cellSize = cellSize
+        self.mask = getMask(('Position', 'Drawable'))
+        self.positionId = getTypeId('Position')
+        self.drawableId = getTypeId('Drawable')
+        self.cells = {}
+        self.layers = []
+        self.layerCounts = {}
+        # [entity, position, drawable, bounds, layer, cell range] by entity id
+        self.records = {}
+        self.moving = {}
+        self.version = currentVersion()
+
+    def __len__(self):
+        return len(self.records)
+
+    def update(self):
+        # Catches up with the moving entities which changed since the last call
+        version = self.version
+        for record in self.moving.itervalues():
+            if record[0].changed > version or record[1].changed > version or record[2].changed > version:
+                self.place(record)
+        self.version = currentVersion()
+
+    def query(self, rect):
+        # The entities overlapping an (x, y, width, height) rect, back to front
+        left, top, right, bottom = self.getCellRange(rect)
+        cells = []
+        for x in xrange(left, right + 1):
+            for y in xrange(top, bottom + 1):
+                cell = self.cells.get((x, y))
+                if cell is not None:
+                    cells.append(cell)
+
+        found = []
+        records = self.records
+        for layer in self.layers:
+            buckets = [cell[layer] for cell in cells if layer in cell]
+            if len(buckets) == 0:
+                continue
+            # Entities over several cells appear once in each, next to each other
+            last = None
+            for id in buckets[0] if len(buckets) == 1 else merge(*buckets):
+                if id != last:
+                    last = id
+                    record = records[id]
+                    if overlaps(record[3], rect):
+                        found.append(record[0])
+        return found
+
+    def place(self, record):
+        entity, position, drawable = record[0], record[1], record[2]
+        width, height = drawable.sprite.current().get_size()
+        value = position.value
+        bounds = (int(value.x), int(value.y), width, height)
+        layer = drawable.layer
+        if bounds == record[3] and layer == record[4]:
+            return
+        cellRange = self.getCellRange(bounds)
+        if record[5] is not None:
+            self.removeCells(entity.id, record[4], record[5])
+        record[3] = bounds
+        record[4] = layer
+        record[5] = cellRange
+        self.addCells(entity.id, layer, cellRange)
+
+    def getCellRange(self, rect):
+        # Inclusive cell coordinates; empty rects still occupy the cell they're in
+        x, y, width, height = rect
+        size = self.cellSize
+        return (x // size, y // size, (x + max(width, 1) - 1) // size, (y + max(height, 1) - 1) // size)
+
+    def addCells(self, id, layer, cellRange):
+        if layer not in self.layerCounts:
+            insort(self.layers, layer)
+            self.layerCounts[layer] = 0
+        self.layerCounts[layer] += 1
+        left, top, right, bottom = cellRange
+        for x in xrange(left, right + 1):
+            for y in xrange(top, bottom + 1):
+                insort(self.cells.setdefault((x, y), {}).setdefault(layer, []), id)
+
+    def removeCells(self, id, layer, cellRange):
+        left, top, right, bottom = cellRange
+        for x in xrange(left, right + 1):
+            for y in xrange(top, bottom + 1):
+                cell = self.cells[(x, y)]
+                ids = cell[layer]
+                del ids[bisect_left(ids, id)]
+                if len(ids) == 0:
+                    del cell[layer]
+                    if len(cell) == 0:
+                        del self.cells[(x, y)]
+        self.layerCounts[layer] -= 1
+        if self.layerCounts[layer] == 0:
+            del self.layerCounts[layer]
+            self.layers.remove(layer)
+
+    def onEntityChanged(self, entity):
+        if not entity.hasComponents(self.mask):
+            self.onEntityRemoved(entity)
+            return
+
+        # The id may now belong to a different entity object, and its
+        # components may have been replaced
+        record = self.records.get(entity.id)
+        if record is None:
+            record = self.records[entity.id] = [entity, None, None, None, None, None]
+        record[0] = entity
+        record[1] = entity.getComponentById(self.positionId)
+        record[2] = entity.getComponentById(self.drawableId)
+        if entity.hasComponent('Static'):
+            self.moving.pop(entity.id, None)
+        else:
+            self.moving[entity.id] = record
+        self.place(record)
+
+    def onEntityRemoved(self, entity):
+        record = self.records.pop(entity.id, None)
+        if record is None:
+            return
+        self.removeCells(entity.id, record[4], record[5])
+        self.moving.pop(entity.id, None)
+
+def overlaps(bounds, rect):
+    x, y, width, height = bounds
+    rectX, rectY, rectWidth, rectHeight = rect
+    return x < rectX + rectWidth and x + width > rectX and \
+        y < rectY + rectHeight and y + height > rectY
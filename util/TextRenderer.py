@@ -0,0 +1,58 @@
+from collections import OrderedDict
+from pygame import Surface, locals
+from .Atlas import Atlas
+from .Asset import Sprite, SpriteData
+
+class TextRenderer(object):
+    '''
+    Draws text in one font and colour from glyphs rendered once onto an atlas,
+    rather than rendering each string with the font. Composed strings are kept
+    in a cache of at most cacheSize entries, dropping the least recently used,
+    so text which changes often (timers, counters) stays cheap without every
+    string it has shown being kept forever. The printable ASCII glyphs are
+    rendered up front, any others the first time they are used.
+    '''
+    def __init__(self, font, color=(255, 255, 255), cacheSize=64):
+        self.font = font
+        self.color = color
+        self.height = font.get_height()
+        self.atlas = Atlas((128, 128), (32, 32))
+        self.glyphs = {}
+        self.cache = OrderedDict()
+        self.cacheSize = cacheSize
+        for code in range(32, 127):
+            self.getGlyph(chr(code))
+
+    def getGlyph(self, char):
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            rendered = self.font.render(char, False, self.color)
+            # Glyphs are copied to alpha surfaces, so they can share atlas pages
+            surface = Surface(rendered.get_size(), locals.SRCALPHA)
+            surface.blit(rendered, (0, 0))
+            glyph = self.glyphs[char] = self.atlas.pack(surface)
+        return glyph
+
+    def render(self, text):
+        # The SpriteData for a string, composed from the glyphs if not cached
+        spriteData = self.cache.pop(text, None)
+        if spriteData is None:
+            spriteData = SpriteData([self.compose(text)], pack=False)
+            if len(self.cache) >= self.cacheSize:
+                self.cache.popitem(False)
+        self.cache[text] = spriteData
+        return spriteData
+
+    def getSprite(self, text):
+        return Sprite(self.render(text))
+
+    def compose(self, text):
+        blits = []
+        x = 0
+        for char in text:
+            glyph = self.getGlyph(char)
+            blits.append((glyph, (x, 0)))
+            x += glyph.get_width()
+        surface = Surface((x, self.height), locals.SRCALPHA)
+        surface.blits(blits, False)
+        return surface
@@ -0,0 +1,135 @@
+from newvector import Vector2
+from ecs import getTypeId, getMask, nextVersion
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class VectorStore(object):
+    '''
+    Keeps the vector values of a fixed set of components (e.g. Position, Velocity
+    and Acceleration) in contiguous numpy arrays, one row per entity, so systems can
+    operate on every body at once. Entities which have all of the components are
+    bound automatically; their components' values become StoredVector views onto
+    their row, so existing per-entity code keeps working unchanged.
+    '''
+    def __init__(self, world, componentNames, capacity=64):
+        if numpy is None:
+            raise ImportError('VectorStore requires numpy')
+        self.world = world
+        self.componentNames = tuple(componentNames)
+        self.typeIds = [getTypeId(name) for name in self.componentNames]
+        self.mask = getMask(self.componentNames)
+        self.arrays = [numpy.zeros((capacity, 2)) for name in self.componentNames]
+        # Change versions for each row, stamped in bulk by markChanged
+        self.versions = [numpy.zeros(capacity, numpy.int64) for name in self.componentNames]
+        self.capacity = capacity
+        self.size = 0
+        self.rows = {}
+        self.bound = {}
+        self.freeRows = []
+        # Bumped whenever an entity is bound or released
+        self.revision = 0
+
+    @staticmethod
+    def isAvailable():
+        return numpy is not None
+
+    def contains(self, entity):
+        return entity.id in self.rows
+
+    def getArray(self, componentName):
+        # Only rows below the high-water mark are ever in use
+        return self.arrays[self.componentNames.index(componentName)][:self.size]
+
+    def getArrays(self, componentNames):
+        return tuple(self.getArray(name) for name in componentNames)
+
+    def markChanged(self, componentName, rows):
+        # Writes straight to the arrays bypass the components, so whoever
+        # writes them stamps the rows they changed (an index or boolean array)
+        field = self.componentNames.index(componentName)
+        self.versions[field][:self.size][rows] = nextVersion()
+
+    def onEntityChanged(self, entity):
+        components = [entity.getComponentById(typeId) for typeId in self.typeIds]
+        bindable = entity.hasComponents(self.mask)
+        for component in components:
+            bindable = bindable and isinstance(getattr(component, '_value', None), Vector2)
+
+        if entity.id in self.rows:
+            if bindable and components == self.bound[entity.id]:
+                return
+            self.release(entity)
+
+        if bindable:
+            self.bind(entity, components)
+
+    def onEntityRemoved(self, entity):
+        if entity.id in self.rows:
+            self.release(entity)
+
+    def bind(self, entity, components):
+        row = self.freeRows.pop() if len(self.freeRows) > 0 else self.allocateRow()
+        self.rows[entity.id] = row
+        self.bound[entity.id] = components
+        self.revision += 1
+        for field, component in enumerate(components):
+            value = component._value
+            self.arrays[field][row] = (value.x, value.y)
+            component._value = StoredVector(self, field, row)
+
+    def release(self, entity):
+        row = self.rows.pop(entity.id)
+        self.revision += 1
+        for component in self.bound.pop(entity.id):
+            value = component._value
+            if isinstance(value, StoredVector) and value._store is self:
+                component._value = Vector2(value.x, value.y)
+        for array in self.arrays:
+            array[row] = 0
+        for versions in self.versions:
+            versions[row] = 0
+        self.freeRows.append(row)
+
+    def allocateRow(self):
+        if self.size == self.capacity:
+            self.capacity *= 2
+            for field, array in enumerate(self.arrays):
+                grown = numpy.zeros((self.capacity, 2))
+                grown[:self.size] = array[:self.size]
+                self.arrays[field] = grown
+                versions = numpy.zeros(self.capacity, numpy.int64)
+                versions[:self.size] = self.versions[field][:self.size]
+                self.versions[field] = versions
+        self.size += 1
+        return self.size - 1
+
+
+class StoredVector(Vector2):
+    # A Vector2 whose coordinates live in a row of a VectorStore array.
+    __slots__ = ['_store', '_field', '_row']
+
+    def __init__(self, store, field, row):
+        self._store = store
+        self._field = field
+        self._row = row
+
+    def getX(self):
+        return float(self._store.arrays[self._field][self._row, 0])
+    def setX(self, value):
+        self._store.arrays[self._field][self._row, 0] = value
+    x = property(getX, setX)
+
+    def getY(self):
+        return float(self._store.arrays[self._field][self._row, 1])
+    def setY(self, value):
+        self._store.arrays[self._field][self._row, 1] = value
+    y = property(getY, setY)
+
+    def set(self, value):
+        self._store.arrays[self._field][self._row] = (value[0], value[1])
+
+    def getVersion(self):
+        return int(self._store.versions[self._field][self._row])
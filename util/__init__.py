@@ -1,3 +1,11 @@
 from enums import *
 from resourcepath import *
+from Atlas import *
 from Asset import *
+from TextRenderer import *
+from VectorStore import *
+from DrawList import *
+from BackgroundCache import *
+from SpatialGrid import *
+from Presenter import *
+from FramePacer import *